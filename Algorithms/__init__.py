@@ -1,4 +1,5 @@
 from .random import Random, TotalRandom
-from .entropy import Entropy
-from .minimax import Minimax, AlphaBeta, Expectimax
+from .entropy import Entropy, EntropyLookahead
+from .minimax import Minimax, AlphaBeta, Expectimax, SparseExpectimax
 from .reinforcement import Reinforcement
+from .tree_policy import TreePolicy
@@ -15,3 +15,7 @@ class Algorithm(ABC):
     def get_action(self, game: AbstractWordle):
         """Returns the next guess given the game being played."""
         pass
+
+    def get_search_stats(self):
+        """Returns a dictionary of statistics of the search of the algorithm so far, by name."""
+        return {}
@@ -1,38 +1,45 @@
 import math
-from typing import Dict
+import os
+import time
+from typing import Optional
 import json
 import numpy as np
-from scipy.stats import entropy
 
 from Algorithms.algorithm import Algorithm
 from WordleGames.abstract_wordle import AbstractWordle
-from utils.common import Word, GameType, AlgorithmType, get_pattern_vanilla
+from utils.common import Word, GameType, AlgorithmType, DATA_DIR, LETTERS_NUM, PATTERNS_NUM, get_pattern_vanilla
+from utils.letter_index import ALPHABET_SIZE, LetterIndex
+from utils.opening_book import OPENING_TURNS, get_opening_book
+from utils.pattern_matrix import PatternMatrix
+from utils.parallel import score_candidates
+from utils.vocabulary import Vocabulary
+from utils.patterns import MAX_BATCH_PAIRS
 
 WORD_FREQ_MAP_FILE = "data/freq_map.json"
+PRIORS_DIR = os.path.join(DATA_DIR, "priors")
+PRIORS_VERSION = 1
+# scores closer than this are considered equal, so the first of the best guesses is chosen regardless of rounding
+SCORE_TOLERANCE = 1e-9
+MAX_PAIRWISE_SECRETS = 16  # the most secret words whose patterns entropies are computed by comparing pairs of words
+BOUNDED_BATCH_SIZE = 256  # the number of guesses scored at once between checks of the entropy bounds
+# the number of positions set in every position bitmask of a letter
+POSITIONS_NUM = np.array([bin(positions).count('1') for positions in range(2 ** LETTERS_NUM)], dtype=np.uint8)
+
+# priors already loaded by this process, keyed by (vocabulary hash, n_common, width_under_sigmoid)
+_loaded_priors = {}
 
 
 class Entropy(Algorithm):
     """An Entropy based algorithm"""
-    def __init__(self):
-        """Initializes the Entropy based algorithm."""
+    def __init__(self, hard_mode=True, processes=1):
+        """Initializes the Entropy based algorithm. In hard mode only the possible words are guessed, and in normal
+        mode every legal word is scored as a guess, preferring possible words between guesses with equal scores.
+        If processes is more than 1, the guesses are scored in parallel by a pool of that many processes."""
         super(Entropy, self).__init__(AlgorithmType.Entropy)
-        # these guesses were pre-computed using the same algorithm
-        self.opening_guesses = {GameType.BasicWordle: "tares", GameType.YellowWordle: "arise",
-                                GameType.NoisyWordle: "tares",
-                                GameType.Absurdle: "tares", GameType.FakeVocabularyWordle: "lxpyn",
-                                GameType.RealVocabularyWordle: {1000: "rates",
-                                                                2000: "tares",
-                                                                3000: "tares",
-                                                                4000: "soare",
-                                                                5000: "tares",
-                                                                6000: "lares",
-                                                                7000: "tares",
-                                                                8000: "lares",
-                                                                9000: "tares",
-                                                                10000: "tares",
-                                                                11000: "tares",
-                                                                12000: "tares",
-                                                                12972: "tares"}}
+        self.hard_mode = hard_mode
+        self.processes = processes
+        self.candidates_num = 0  # the number of guesses considered by choose_action
+        self.pruned_num = 0  # the number of them skipped since their entropy bound could not beat the best guess
 
     def get_pattern(self, guess: Word, secret_word: Word, game: AbstractWordle):
         """Returns the best pattern for the game that is being played."""
@@ -41,90 +48,184 @@ class Entropy(Algorithm):
         else:
             return game.get_pattern(guess, secret_word)
 
-    def get_pattern_probs(self, guess: Word, game: AbstractWordle) -> Dict[tuple, float]:
-        """Calculates the probabilities of every pattern to appear assuming uniform distribution.
-        We generate a pattern between the guess and every possible word, sum the amount of times each pattern was
-        generated, and divide by the number of possible words to get the probabilities."""
-        pattern_counts = {tuple(pattern): 0 for pattern in game.get_all_patterns()}
-        possible_secret_words = game.get_possible_words()
-        for secret_word in possible_secret_words:
-            pattern_counts[tuple(self.get_pattern(guess, secret_word, game))] += 1
-
-        possible_words_num = len(possible_secret_words)
-        pattern_probs = {k: v / possible_words_num for k, v in pattern_counts.items()}
-
-        return pattern_probs
-
-    def get_expected_info(self, guess: Word, game: AbstractWordle) -> float:
-        """Calculates the entropy - the expected information we get from a guess."""
-        pattern_probs = self.get_pattern_probs(guess, game)
-        return sum(prob * math.log2(1 / prob) if prob != 0 else 0 for prob in pattern_probs.values())
+    def get_expected_infos(self, guess_ids: np.ndarray, game: AbstractWordle, weights=None) -> np.ndarray:
+        """Calculates the entropies of all the guesses with the given ids at once.
+        We take the block of the pattern codes of the guesses according to the possible words from the game's pattern
+        matrix, count every pattern code in every row with a single bincount (summing the weights of the possible
+        words if they are given), and compute the entropy of every row with NumPy. When there are only a few
+        possible words, the codes of every pair of them are compared instead. The guesses are processed in batches so
+        the block stays small."""
+        return get_entropies(game.get_pattern_matrix(), guess_ids, game.get_possible_ids(), weights)
+
+    def get_guess_ids(self, game: AbstractWordle) -> np.ndarray:
+        """Returns the ids of the words scored as guesses - the possible words in hard mode and all the legal words
+        in normal mode."""
+        if self.hard_mode:
+            return game.get_possible_ids()
+        return game.get_vocabulary().all_ids
+
+    def choose_guess(self, guess_ids: np.ndarray, scores: np.ndarray, game: AbstractWordle) -> Word:
+        """Returns the first of the guesses with the highest score, preferring possible words in normal mode."""
+        is_possible = None if self.hard_mode else np.isin(guess_ids, game.get_possible_ids())
+        return game.get_vocabulary().words[guess_ids[get_first_best(scores, is_possible)]]
+
+    def get_policy_name(self) -> Optional[str]:
+        """Returns the name of the policy of the algorithm, naming its cached opening book and decision tree, or None
+        if its guesses depend on the time it searches for, so they are never cached."""
+        return f"entropy_{'hard' if self.hard_mode else 'normal'}"
 
     def get_action(self, game: AbstractWordle) -> Word:
-        """Returns the next guess given the game being played."""
-        if game.get_turn_num() == 1:
-            if game.get_type() != GameType.RealVocabularyWordle:
-                return self.opening_guesses[game.get_type()]
-            else:
-                return self.opening_guesses[game.get_type()][game.get_vocab_size()]
-
-        best_expected_info = -math.inf
-        best_word = None
-
-        possible_words = game.get_possible_words()
-        for word in possible_words:
-            expected_info = self.get_expected_info(word, game)
-            if expected_info > best_expected_info:
-                best_expected_info = expected_info
-                best_word = word
-        return best_word
+        """Returns the next guess given the game being played, looking up the opening book in the first turns (if the
+        policy of the algorithm is cached)."""
+        if game.get_turn_num() <= OPENING_TURNS and self.get_policy_name() is not None:
+            book_guess = get_opening_book(self, game).get_guess(game.get_game_state())
+            if book_guess is not None:
+                return book_guess
+        return self.choose_action(game)
+
+    def get_bounded_infos(self, guess_ids: np.ndarray, game: AbstractWordle) -> np.ndarray:
+        """Calculates the entropies of the guesses with the given ids by branch and bound.
+        The guesses are ordered by upper bounds of their entropies computed from letter frequencies of the possible
+        words (see get_entropy_bounds), and scored in batches in that order until the bound of the next guess is
+        below the best entropy found. The guesses left are never scored, and get an entropy of -inf, so the guess
+        with the highest entropy is the one found by scoring every guess."""
+        possible_ids = game.get_possible_ids()
+        if len(guess_ids) * len(possible_ids) <= MAX_BATCH_PAIRS:  # scoring every guess is as cheap as bounding
+            return score_candidates(self.get_expected_infos, guess_ids, game, self.processes)
+        bounds = get_entropy_bounds(game.get_letter_index(), guess_ids, possible_ids)
+        order = np.argsort(-bounds, kind='stable')
+        sorted_bounds = bounds[order]
+        expected_infos = np.full(len(guess_ids), -np.inf)
+        best_info = -np.inf
+        scored_num = 0
+        while scored_num < len(order) and sorted_bounds[scored_num] >= best_info - SCORE_TOLERANCE:
+            # the guesses whose bounds are below the best entropy by more than the tolerance cannot be chosen
+            reachable_num = np.searchsorted(-sorted_bounds, SCORE_TOLERANCE - best_info, side='right')
+            batch = order[scored_num:min(scored_num + BOUNDED_BATCH_SIZE * self.processes, reachable_num)]
+            batch_infos = score_candidates(self.get_expected_infos, guess_ids[batch], game, self.processes)
+            expected_infos[batch] = batch_infos
+            best_info = max(best_info, batch_infos.max())
+            scored_num += len(batch)
+        self.pruned_num += len(guess_ids) - scored_num
+        return expected_infos
+
+    def get_search_stats(self):
+        """Returns the number of guesses considered by the algorithm and the number of them pruned by the entropy
+        bounds."""
+        pruned_percentage = self.pruned_num / self.candidates_num * 100.0 if self.candidates_num else 0.0
+        return {"# Candidates": self.candidates_num, "# Pruned candidates": self.pruned_num,
+                "% Pruned candidates": f"{pruned_percentage:.3f}"}
+
+    def choose_action(self, game: AbstractWordle) -> Word:
+        """Returns the guess with the highest entropy."""
+        if not len(game.get_possible_ids()):
+            return None
+        guess_ids = self.get_guess_ids(game)
+        self.candidates_num += len(guess_ids)
+        expected_infos = self.get_bounded_infos(guess_ids, game)
+        return self.choose_guess(guess_ids, expected_infos, game)
 
 
 class EntropyFrequency(Entropy):
     """An Entropy based algorithm which incorporates word frequencies."""
-    def __init__(self):
+    def __init__(self, hard_mode=True, processes=1):
         """Initializes the Entropy with word frequencies algorithm."""
-        super(EntropyFrequency, self).__init__()
-        self.priors = get_frequency_based_priors()
-
-    def get_pattern_freq_probs(self, guess: Word, game: AbstractWordle, word_to_prob) -> Dict[tuple, float]:
-        """Calculates the probabilities of every pattern to appear using the probabilities of each word.
-        We generate a pattern between the guess and every possible word, and add the probability of the possible word."""
-        pattern_probs = {tuple(pattern): 0 for pattern in game.get_all_patterns()}
-        possible_secret_words = game.get_possible_words()
-        for secret_word in possible_secret_words:
-            pattern_probs[tuple(self.get_pattern(guess, secret_word, game))] += word_to_prob[secret_word]
-        return pattern_probs
-
-    def get_expected_freq_info(self, guess: Word, game: AbstractWordle, word_to_prob) -> float:
-        """Calculates the entropy - the expected information we get from a guess taking into account the
-        probabilities of every possible word."""
-        pattern_probs = self.get_pattern_freq_probs(guess, game, word_to_prob)
-        return sum(prob * math.log2(1 / prob) if prob != 0 else 0 for prob in pattern_probs.values())
-
-    def get_action(self, game: AbstractWordle) -> Word:
-        """Returns the next guess given the game being played."""
-        if game.get_turn_num() == 1:
-            if game.get_type() != GameType.RealVocabularyWordle:
-                return self.opening_guesses[game.get_type()]
-            else:
-                return self.opening_guesses[game.get_type()][game.get_vocab_size()]
-
-        best_expected_info = math.inf
-        best_word = None
-
-        possible_words = game.get_possible_words()
-        weights = get_weights(possible_words, self.priors)
+        super(EntropyFrequency, self).__init__(hard_mode, processes)
+
+    def get_policy_name(self) -> str:
+        """Returns the name of the policy of the algorithm, naming its cached opening book and decision tree."""
+        return f"entropy_frequency_{'hard' if self.hard_mode else 'normal'}"
+
+    def choose_action(self, game: AbstractWordle) -> Word:
+        """Returns the guess with the lowest expected score."""
+        possible_ids = game.get_possible_ids()
+        if not len(possible_ids):
+            return None
+        weights = get_weights(possible_ids, get_priors(game.get_vocabulary()))
         distribution_entropy = entropy_of_distributions(weights)
-        word_to_weight = dict(zip(possible_words, weights)) # Dictionary of the probabilities of the possible words.
-        for word in possible_words:
-            expected_info = self.get_expected_freq_info(word, game, word_to_weight)
-            prob = word_to_weight[word]
-            expected_score = get_expected_scores(prob, distribution_entropy, expected_info)
-            if expected_score < best_expected_info:
-                best_expected_info = expected_score
-                best_word = word
-        return best_word
+        guess_ids = self.get_guess_ids(game)
+        self.candidates_num += len(guess_ids)
+        if self.hard_mode:
+            guess_probs = weights
+        else:  # the guesses which are not possible words have no chance to be the secret word
+            guess_probs = np.zeros(len(guess_ids))
+            guess_probs[possible_ids] = weights
+        expected_infos = score_candidates(self.get_expected_infos, guess_ids, game, self.processes, weights)
+        expected_scores = get_expected_scores(guess_probs, distribution_entropy, expected_infos)
+        return self.choose_guess(guess_ids, -expected_scores, game)
+
+
+class EntropyLookahead(Entropy):
+    """
+    An Entropy based algorithm looking two turns ahead. The top_k guesses by entropy are scored again by their entropy
+    plus the expected entropy of the best guess of the next turn, over the buckets of possible words answering every
+    pattern of the guess. The lookahead stops when it would look up more than max_pairs patterns in total, or when
+    time_limit seconds pass (if given), and the guesses it did not reach are not chosen.
+    """
+    def __init__(self, hard_mode=True, processes=1, top_k=10, max_pairs=2 ** 25, time_limit=None):
+        """Initializes the Entropy lookahead algorithm with its pruning and budget parameters."""
+        super(EntropyLookahead, self).__init__(hard_mode, processes)
+        self.type = AlgorithmType.EntropyLookahead
+        self.top_k = top_k
+        self.max_pairs = max_pairs
+        self.time_limit = time_limit
+
+    def get_policy_name(self) -> Optional[str]:
+        """Returns the name of the policy of the algorithm, naming its cached opening book and decision tree. A
+        lookahead cut by its time limit depends on the speed and load of the machine, so its guesses are never
+        cached."""
+        if self.time_limit is not None:
+            return None
+        return f"entropy_lookahead_{'hard' if self.hard_mode else 'normal'}_top{self.top_k}_pairs{self.max_pairs}"
+
+    def get_next_turn_info(self, buckets, game: AbstractWordle) -> float:
+        """Returns the expected entropy of the best guess of the next turn, given the buckets of the possible words
+        answering every pattern of this turn's guess."""
+        pattern_matrix = game.get_pattern_matrix()
+        all_ids = game.get_vocabulary().all_ids
+        possible_words_num = sum(len(bucket) for bucket in buckets)
+        next_turn_info = 0.0
+        for bucket in buckets:
+            if len(bucket) > 1:  # there is nothing left to learn about a single word
+                next_guess_ids = bucket if self.hard_mode else all_ids
+                best_info = get_entropies(pattern_matrix, next_guess_ids, bucket).max()
+                next_turn_info += len(bucket) / possible_words_num * best_info
+        return next_turn_info
+
+    def get_lookahead_pairs(self, buckets, game: AbstractWordle) -> int:
+        """Returns the number of patterns looked up by get_next_turn_info for the buckets."""
+        if self.hard_mode:
+            return sum(len(bucket) ** 2 for bucket in buckets if len(bucket) > 1)
+        return len(game.get_vocabulary()) * sum(len(bucket) for bucket in buckets if len(bucket) > 1)
+
+    def choose_action(self, game: AbstractWordle) -> Word:
+        """Returns the guess with the highest two turn entropy among the top_k guesses by entropy, or the guess with
+        the highest entropy if the budget does not allow looking ahead."""
+        possible_ids = game.get_possible_ids()
+        if not len(possible_ids):
+            return None
+        guess_ids = self.get_guess_ids(game)
+        self.candidates_num += len(guess_ids)
+        expected_infos = score_candidates(self.get_expected_infos, guess_ids, game, self.processes)
+        top_indices = np.argsort(-expected_infos, kind='stable')[:self.top_k]
+
+        pattern_matrix = game.get_pattern_matrix()
+        words = game.get_vocabulary().words
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+        pairs_left = self.max_pairs
+        two_turn_infos = []
+        for index in top_indices.tolist():
+            _, buckets = pattern_matrix.get_buckets(words[guess_ids[index]], possible_ids)
+            pairs = self.get_lookahead_pairs(buckets, game)
+            if pairs > pairs_left or (deadline is not None and time.time() > deadline):
+                break
+            pairs_left -= pairs
+            two_turn_infos.append(expected_infos[index] + self.get_next_turn_info(buckets, game))
+
+        if not two_turn_infos:
+            return self.choose_guess(guess_ids, expected_infos, game)
+        looked_ahead_ids = guess_ids[top_indices[:len(two_turn_infos)]]
+        return self.choose_guess(looked_ahead_ids, np.array(two_turn_infos), game)
 
 
 def get_word_frequencies():
@@ -135,11 +236,11 @@ def get_word_frequencies():
 
 
 def sigmoid(x):
-    """Applies the sigmoid function to a given number."""
-    return 1 / (1 + math.exp(-x))
+    """Applies the sigmoid function to a given number or array."""
+    return 1 / (1 + np.exp(-x))
 
 
-def get_frequency_based_priors(n_common=3000, width_under_sigmoid=10):
+def get_frequency_based_priors(words, n_common=3000, width_under_sigmoid=10) -> np.ndarray:
     """
     We know that that list of wordle answers was curated by some human
     based on whether they're sufficiently common. This function aims
@@ -147,27 +248,52 @@ def get_frequency_based_priors(n_common=3000, width_under_sigmoid=10):
     be selected for the final answer.
 
     Sort the words by frequency, then apply a sigmoid along it.
+    Returns a float32 array of the priors of the given words, where words
+    without a known frequency get the prior of the least common word.
     """
     freq_map = get_word_frequencies()
-    words = np.array(list(freq_map.keys()))
-    freqs = np.array([freq_map[w] for w in words])
+    freq_words = np.array(list(freq_map.keys()))
+    freqs = np.array(list(freq_map.values()))
     arg_sort = freqs.argsort()
-    sorted_words = words[arg_sort]
+    sorted_words = freq_words[arg_sort]
 
     # We want to imagine taking this sorted list, and putting it on a number
     # line so that it's length is 10, situating it so that the n_common most common
     # words are positive, then applying a sigmoid
     x_width = width_under_sigmoid
-    c = x_width * (-0.5 + n_common / len(words))
-    xs = np.linspace(c - x_width / 2, c + x_width / 2, len(words))
-    priors = dict()
-    for word, x in zip(sorted_words, xs):
-        priors[word] = sigmoid(x)
-    return priors
-
-def get_weights(words, priors):
-    """Returns a probabilities (weights) dictionary for the given words given the priors (after applying sigmoid)"""
-    frequencies = np.array([priors[word] for word in words])
+    c = x_width * (-0.5 + n_common / len(freq_words))
+    xs = np.linspace(c - x_width / 2, c + x_width / 2, len(freq_words))
+    sorted_priors = sigmoid(xs)
+    word_priors = dict(zip(sorted_words.tolist(), sorted_priors.tolist()))
+    return np.array([word_priors.get(word, sorted_priors[0]) for word in words], dtype=np.float32)
+
+
+def get_priors(vocabulary: Vocabulary, n_common=3000, width_under_sigmoid=10) -> np.ndarray:
+    """
+    Returns the frequency based priors of the words of the vocabulary as a float32 array aligned to the word ids.
+    The priors are computed once per vocabulary and stored as a .npy file keyed by a hash of the word list, so later
+    calls (and later processes) load them without parsing the frequencies.
+    """
+    key = (vocabulary.get_hash(), n_common, width_under_sigmoid)
+    if key not in _loaded_priors:
+        path = os.path.join(PRIORS_DIR, f"priors_v{PRIORS_VERSION}_{n_common}_{width_under_sigmoid}_"
+                                        f"{vocabulary.get_hash()}.npy")
+        if os.path.isfile(path):
+            priors = np.load(path)
+        else:
+            priors = get_frequency_based_priors(vocabulary.words, n_common, width_under_sigmoid)
+            os.makedirs(PRIORS_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, priors)
+            os.replace(tmp_path, path)  # atomic, so other processes never see a partially written file
+        _loaded_priors[key] = priors
+    return _loaded_priors[key]
+
+
+def get_weights(word_ids, priors):
+    """Returns the probabilities (weights) of the words with the given ids given the priors of the vocabulary"""
+    frequencies = priors[word_ids].astype(np.float64)
     total = frequencies.sum()
     if total == 0:
         return np.zeros(frequencies.shape)
@@ -176,36 +302,104 @@ def get_weights(words, priors):
 
 def entropy_of_distributions(distributions, atol=1e-12):
     """Returns the entropy of the entire distribution.
-    In our case the entropy according to the probabilities of all possible words."""
+    In our case the entropy according to the probabilities of all possible words.
+    The distributions are normalized along the last axis (like scipy.stats.entropy), so rows of counts or weights
+    are valid distributions, and the entropy of every row of a block is computed at once."""
     axis = len(distributions.shape) - 1
-    return entropy(distributions, base=2, axis=axis)
+    probs = distributions / distributions.sum(axis=axis, keepdims=True)
+    logs = np.log2(probs, out=np.zeros(probs.shape), where=probs > atol)
+    return -(probs * logs).sum(axis=axis)
 
 
-def entropy_to_expected_score(ent):
+def get_expected_scores(prob, h0, h1):
     """
-    Based on a regression associating entropies with typical scores
-    from that point forward in simulated games, this function returns
-    what the expected number of guesses required will be in a game where
-    there's a given amount of entropy in the remaining possibilities.
+    If this guess is the true answer, score is 1. Otherwise, it's 1 plus
+    the expected number of guesses it will take after getting the corresponding
+    amount of information, estimated by the entropy left after the guess.
     """
-    # Assuming you can definitely get it in the next guess,
-    # this is the expected score
-    min_score = 2**(-ent) + 2 * (1 - 2**(-ent))
+    return prob + (1 - prob) * (1 + np.maximum(h0-h1, 0))
 
-    # To account for the likely uncertainty after the next guess,
-    # and knowing that entropy of 11.5 bits seems to have average
-    # score of 3.5, we add a line to account
-    # we add a line which connects (0, 0) to (3.5, 11.5)
-    return min_score + 1.5 * ent / 11.5
 
+def get_patterns_counts(codes: np.ndarray, weights=None) -> np.ndarray:
+    """
+    Returns a row-wise bincount of a block of pattern codes - a len(codes) x PATTERNS_NUM array counting every pattern
+    code in every row, or summing the weights of the columns having it if weights are given.
+    Every row is shifted to its own range of PATTERNS_NUM bins, so the whole block is counted by one bincount.
+    """
+    rows_num = len(codes)
+    shifted_codes = codes.astype(np.intp) + np.arange(rows_num)[:, None] * PATTERNS_NUM
+    if weights is not None:
+        weights = np.broadcast_to(weights, codes.shape).ravel()
+    counts = np.bincount(shifted_codes.ravel(), weights=weights, minlength=rows_num * PATTERNS_NUM)
+    return counts.reshape(rows_num, PATTERNS_NUM)
+
+
+def get_entropies(pattern_matrix: PatternMatrix, guess_ids: np.ndarray, secret_ids: np.ndarray,
+                  weights=None) -> np.ndarray:
+    """Returns the entropies of the patterns of the guesses with the given ids according to the secret words with the
+    given ids (weighted by the weights of the secret words if they are given), processing the guesses in batches."""
+    entropies = np.empty(len(guess_ids))
+    pairwise = len(secret_ids) <= MAX_PAIRWISE_SECRETS
+    batch_size = max(1, MAX_BATCH_PAIRS // max(1, len(secret_ids) ** 2 if pairwise else len(secret_ids)))
+    for start in range(0, len(guess_ids), batch_size):
+        codes = pattern_matrix.get_codes_block(guess_ids[start:start + batch_size], secret_ids)
+        if pairwise:
+            entropies[start:start + batch_size] = get_pairwise_entropies(codes, weights)
+        else:
+            entropies[start:start + batch_size] = entropy_of_distributions(get_patterns_counts(codes, weights))
+    return entropies
 
-def get_expected_scores(prob, h0, h1):
+
+def get_pairwise_entropies(codes: np.ndarray, weights=None) -> np.ndarray:
+    """Returns the entropies of the patterns in every row of the codes by comparing the codes of every pair of secret
+    words, which is faster than counting all the patterns of every row when there are only a few secret words."""
+    if weights is None:
+        weights = np.ones(codes.shape[1])
+    probabilities = weights / weights.sum()
+    same_pattern = codes[:, :, np.newaxis] == codes[:, np.newaxis, :]
+    pattern_probabilities = same_pattern @ probabilities  # the probability of the pattern of every secret word
+    log_probabilities = np.log2(pattern_probabilities, out=np.zeros_like(pattern_probabilities),
+                                where=pattern_probabilities > 0)
+    return -(log_probabilities @ probabilities)
+
+
+def get_entropy_bounds(letter_index: LetterIndex, guess_ids: np.ndarray, secret_ids: np.ndarray,
+                       weights=None) -> np.ndarray:
     """
-    If this guess is the true answer, score is 1. Otherwise, it's 1 plus
-    the expected number of guesses it will take after getting the corresponding
-    amount of information.
-    We found the absolute function wo work better than entropy_to_expected_score.
+    Returns upper bounds of the entropies of the patterns of the guesses with the given ids according to the secret
+    words with the given ids, without computing any pattern.
+    For every letter of a guess, the placings of its copies are determined by the positions of the copies where the
+    secret word has the letter too, and by the number of copies of the letter in the secret word (up to the number of
+    copies in the guess), so the entropy of the pattern is at most the sum of the entropies of these outcomes over
+    the letters of the guess. The entropy of the outcomes of a letter depends only on the positions of its copies in
+    the guess, so it is computed once for every letter and set of positions, and the bound of a guess is a sum of
+    table lookups. An entropy is also at most log2 of the number of patterns it spreads the secret words over.
     """
-    return prob + (1 - prob) * (1 + max(h0-h1, 0))
+    secret_positions = letter_index.letter_positions[secret_ids]
+    secret_counts = POSITIONS_NUM[secret_positions]
+    guess_positions_sets = np.arange(1, 2 ** LETTERS_NUM, dtype=np.uint8)
+    outcomes_num = 2 ** LETTERS_NUM * (LETTERS_NUM + 1)
+    outcome_offsets = np.arange(len(guess_positions_sets)) * outcomes_num
+    outcome_weights = None if weights is None else np.repeat(weights, len(guess_positions_sets))
+    letter_entropies = np.zeros((ALPHABET_SIZE, 2 ** LETTERS_NUM))
+    for letter in range(ALPHABET_SIZE):
+        # the outcome of every secret word for every set of positions of the letter in a guess
+        outcomes = (secret_positions[:, letter, None] & guess_positions_sets) * (LETTERS_NUM + 1) + \
+            np.minimum(secret_counts[:, letter, None], POSITIONS_NUM[guess_positions_sets])
+        counts = np.bincount((outcomes + outcome_offsets).ravel(), weights=outcome_weights,
+                             minlength=len(guess_positions_sets) * outcomes_num)
+        letter_entropies[letter, 1:] = entropy_of_distributions(counts.reshape(-1, outcomes_num))
+    guess_positions = letter_index.letter_positions[guess_ids]
+    bounds = letter_entropies[np.arange(ALPHABET_SIZE), guess_positions].sum(axis=1)
+    return np.minimum(bounds, math.log2(min(PATTERNS_NUM, len(secret_ids))))
+
+
+def get_first_best(scores: np.ndarray, preferred=None) -> int:
+    """Returns the index of the first of the highest scores, treating scores within SCORE_TOLERANCE as equal.
+    If a boolean preferred array is given, the first preferred index among the highest scores is returned if any."""
+    is_best = scores >= scores.max() - SCORE_TOLERANCE
+    if preferred is not None and (is_best & preferred).any():
+        is_best &= preferred
+    return int(np.flatnonzero(is_best)[0])
 
 
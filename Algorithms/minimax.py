@@ -1,24 +1,42 @@
+import time
+from typing import Optional
+
 import numpy as np
 from abc import abstractmethod
 
 from Algorithms.algorithm import Algorithm
+from Algorithms.entropy import get_patterns_counts, get_priors
 from WordleGames.abstract_wordle import AbstractWordle
 from utils.common import AlgorithmType
 from utils import util
 
 import random
-from utils.common import MAX, MIN, GameType, Placing
+from utils.common import MAX, MIN, Placing, PATTERN_PLACINGS, PATTERNS_NUM
+from utils.opening_book import OPENING_TURNS, get_opening_book
+from utils.patterns import MAX_BATCH_PAIRS
+from utils.parallel import SharedArray, score_candidates
+from utils.transposition_table import DEFAULT_TABLE_SIZE, TranspositionTable
+
+MAX_ANYTIME_DEPTH = 6  # the deepest iteration of the anytime search
+DEFAULT_SAMPLE_SIZE = 32  # the number of secret words sampled at every chance node of the sparse Expectimax
+
+
+class SearchTimeout(Exception):
+    """Raised by the anytime search when its deadline passes."""
+    pass
 
 
-def generate_successor(game: AbstractWordle, agent_index=MAX, action=None):
+def generate_successor(game: AbstractWordle, agent_index=MAX, action=None, possible_ids=None):
     """
     Returns a game logic successor after a player turn was complete.
+    For the MIN player, the ids of the possible words answering the guess with the pattern may be given, so the
+    successor does not filter them again.
     """
     successor = game.successor_creator()
     if agent_index == MAX:
         successor.apply_action(action)  # action = guess
     elif agent_index == MIN:
-        successor.apply_opponent_action(action)  # action = pattern
+        successor.apply_opponent_action(action, possible_ids)  # action = pattern
     else:
         raise Exception("illegal agent index.")
     return successor
@@ -28,7 +46,7 @@ def get_legal_actions(game: AbstractWordle, agent_index=MAX):
     """
     Returns legal action for each player.
     For MAX player, this function returns a new list of possible words.
-    For Min player, this function returns a list of new possible patterns
+    For Min player, this function returns a Counter of the codes of the new possible patterns
     """
     if agent_index == MAX:
         return game.get_possible_words()
@@ -39,150 +57,475 @@ def get_legal_actions(game: AbstractWordle, agent_index=MAX):
         raise Exception("illegal agent index.")
 
 
+def get_largest_buckets(game: AbstractWordle, action_ids) -> np.ndarray:
+    """Returns the number of possible words in the largest bucket every guess with the given ids splits the possible
+    words into, counting the patterns of all the guesses with a single bincount. In games whose patterns depend only
+    on the secret word, it is the depth 1 minimax score of the guess, negated."""
+    codes = game.get_pattern_matrix().get_codes_block(action_ids, game.get_possible_ids())
+    return get_patterns_counts(codes).max(axis=1)
+
+
+def get_expected_buckets(game: AbstractWordle, action_ids) -> np.ndarray:
+    """Returns the expected number of possible words left by every guess with the given ids (the sum of the squared
+    sizes of the buckets it splits the possible words into, over their number), counting the patterns of the guesses
+    in batches. In games whose patterns depend only on the secret word, it is the depth 1 expectimax score of the
+    guess, negated."""
+    possible_ids = game.get_possible_ids()
+    batch_size = max(1, MAX_BATCH_PAIRS // max(1, len(possible_ids)))
+    expected_buckets = np.empty(len(action_ids))
+    for start in range(0, len(action_ids), batch_size):
+        codes = game.get_pattern_matrix().get_codes_block(action_ids[start:start + batch_size], possible_ids)
+        counts = get_patterns_counts(codes)
+        expected_buckets[start:start + batch_size] = (counts * counts).sum(axis=1) / len(possible_ids)
+    return expected_buckets
+
+
+def get_pattern_buckets(game: AbstractWordle):
+    """
+    Returns a list of (pattern code, number of possible words, ids of the possible words) for every pattern the MIN
+    player may answer the last guess with.
+    In games whose patterns depend only on the secret word, the possible words are split by their pattern codes in
+    one pass over the row of the guess in the pattern matrix, and every bucket holds the possible words of the
+    successor of its pattern. In other games the ids are None, so the successors filter their possible words.
+    """
+    guess, _ = game.states[-1]
+    if not game.fixed_patterns:
+        return [(pattern, count, None) for pattern, count in game.get_possible_patterns(guess).items()]
+    patterns, buckets = game.get_pattern_matrix().get_buckets(guess, game.get_possible_ids())
+    return [(pattern, len(bucket), bucket) for pattern, bucket in zip(patterns, buckets)]
+
+
 class AdversarialAgent(Algorithm):
     """An abstract class representing each adversarial type agent"""
-    def __init__(self, algorithm_type, depth=1):
-        """Initializes the adversarial agent class, which contains the depth at which the agents will run"""
+    def __init__(self, algorithm_type, depth=1, processes=1, table_size=DEFAULT_TABLE_SIZE):
+        """Initializes the adversarial agent class, which contains the depth at which the agents will run, the
+        number of processes scoring the actions in parallel (1 for scoring them in this process), and the number of
+        searched states kept in its transposition table"""
         super(AdversarialAgent, self).__init__(algorithm_type)
         self.depth = depth
-        self.opening_guesses = None
-        self.absurdle_computed_second_guess = ""
+        self.processes = processes
+        self.transposition_table = TranspositionTable(table_size)
 
     @abstractmethod
     def adversarial_search(self, curr_depth, game: AbstractWordle, player_id, alpha=0.0, beta=0.0):
         """simulating the game as a two player game, and returning a score based on the agent logic"""
         pass
 
+    def get_table_key(self, curr_depth, game: AbstractWordle, player_id):
+        """Returns the key of a searched state in the transposition table - the game type, the hash of the possible
+        words, the guess answered by the MIN player, the remaining depth and the player"""
+        guess = game.states[-1][0] if player_id == MIN else None
+        return game.get_type(), game.get_possible_hash(), guess, self.depth * 2 - curr_depth, player_id
+
+    def search_pattern(self, curr_depth, game: AbstractWordle, pattern, possible_ids, alpha=0.0, beta=0.0):
+        """Returns the score of the MIN player answering the last guess with the pattern, leaving the possible words
+        with the given ids (None if they are to be filtered). Successors at the maximal depth are scored by
+        evaluation_function straight from the number of their possible words, without building them"""
+        if possible_ids is not None and curr_depth + 1 == self.depth * 2:
+            return evaluation_function_possible_num(len(possible_ids))
+        successor_game = generate_successor(game, agent_index=MIN, action=pattern, possible_ids=possible_ids)
+        return self.adversarial_search(curr_depth + 1, successor_game, MAX, alpha, beta)
+
+    def get_search_stats(self):
+        """Returns the hits and misses of the transposition table"""
+        return self.transposition_table.get_stats()
+
+    def get_policy_name(self) -> Optional[str]:
+        """Returns the name of the policy of the agent, naming its cached opening book and decision tree, or None if
+        its moves depend on the time it searches for, so they are never cached."""
+        return f"{self.type.name.lower()}_depth{self.depth}"
+
     def get_action(self, game: AbstractWordle):
+        """Returns the adversarial agent action, looking up the opening book in the first turns (if the policy of the
+        agent is cached)."""
+        if game.get_turn_num() <= OPENING_TURNS and self.get_policy_name() is not None:
+            book_guess = get_opening_book(self, game).get_guess(game.get_game_state())
+            if book_guess is not None:
+                return book_guess
+        return self.choose_action(game)
+
+    def choose_action(self, game: AbstractWordle):
         """Returns the adversarial agent action using self.depth"""
-        if game.get_turn_num() == 1:
-            if game.get_type() != GameType.RealVocabularyWordle:
-                return self.opening_guesses[game.get_type()]
-            else:
-                return self.opening_guesses[game.get_type()][game.get_vocab_size()]
-        elif game.get_type() == GameType.Absurdle and game.get_turn_num() == 2:
-            return self.absurdle_computed_second_guess
-
         possible_words = game.get_possible_words()
         best_action = random.choice(possible_words)
         high_score = -np.inf
-        for word in (possible_words):
-            successor_game = generate_successor(game, agent_index=MAX, action=word)
-            minimax_score = self.adversarial_search(1, successor_game, MIN, -np.inf, np.inf)
+        scores = self.score_root_actions(game)
+        for word, minimax_score in zip(possible_words, scores.tolist()):
             if high_score < minimax_score:
                 high_score = minimax_score
                 best_action = word
         return best_action
 
+    def score_root_actions(self, game: AbstractWordle) -> np.ndarray:
+        """Returns the adversarial search scores of the possible words, split between self.processes processes"""
+        return score_candidates(self.score_actions, game.get_possible_ids(), game, self.processes)
+
+    def score_actions(self, action_ids, game: AbstractWordle) -> np.ndarray:
+        """Returns the adversarial search scores of the actions (words) with the given ids"""
+        scores = np.empty(len(action_ids))
+        for i, word in enumerate(game.get_vocabulary().get_words(action_ids)):
+            successor_game = generate_successor(game, agent_index=MAX, action=word)
+            scores[i] = self.adversarial_search(1, successor_game, MIN, -np.inf, np.inf)
+        return scores
+
 
 class Minimax(AdversarialAgent):
     """Classing minimax agent"""
-    def __init__(self, algorithm_type=AlgorithmType.Minimax):
+    def __init__(self, algorithm_type=AlgorithmType.Minimax, processes=1):
         """Initializes the Minimax agent class"""
-        super(Minimax, self).__init__(algorithm_type)
-        self.opening_guesses = {GameType.BasicWordle: "serai", GameType.YellowWordle: "arise",
-                                GameType.NoisyWordle: "stoae", GameType.Absurdle: "serai",
-                                GameType.FakeVocabularyWordle: "zpnoy",
-                                GameType.RealVocabularyWordle: {1000: "aeros",
-                                                                2000: "lanes",
-                                                                3000: "soare",
-                                                                4000: "serai",
-                                                                5000: "nears",
-                                                                6000: "reans",
-                                                                7000: "serai",
-                                                                8000: "reais",
-                                                                9000: "serai",
-                                                                10000: "serai",
-                                                                11000: "serai",
-                                                                12000: "serai",
-                                                                12972: "serai"}}
-        self.absurdle_computed_second_guess = "bludy"
+        super(Minimax, self).__init__(algorithm_type, processes=processes)
 
 
     def adversarial_search(self, curr_depth, game: AbstractWordle, player_id, alpha=0.0, beta=0.0):
             """simulating the game as a two player game, and returning a score based on the minimax logic"""
-            legal_actions = get_legal_actions(game, player_id)
-            if curr_depth == self.depth * 2 or game.get_done() or not legal_actions:
+            if curr_depth == self.depth * 2 or game.get_done():
+                return evaluation_function(game)
+            key = self.get_table_key(curr_depth, game, player_id)
+            value = self.transposition_table.lookup(key)
+            if value is not None:
+                return value
+            legal_actions = get_legal_actions(game) if player_id == MAX else get_pattern_buckets(game)
+            if not legal_actions:
                 return evaluation_function(game)
 
             result_lst = []
             for i, action in enumerate(legal_actions):
-                successor_game = generate_successor(game, agent_index=player_id, action=action)
                 if player_id == MAX:
+                    successor_game = generate_successor(game, agent_index=player_id, action=action)
                     result_lst.append(self.adversarial_search(curr_depth + 1, successor_game, MIN))
                 else:
-                    result_lst.append(self.adversarial_search(curr_depth + 1, successor_game, MAX))
-            return max(result_lst) if player_id == MAX else min(result_lst)
+                    pattern, _, possible_ids = action
+                    result_lst.append(self.search_pattern(curr_depth, game, pattern, possible_ids))
+            value = max(result_lst) if player_id == MAX else min(result_lst)
+            self.transposition_table.store(key, value)
+            return value
 
 
 class AlphaBeta(Minimax):
-    """Minimax with alpha-beta pruning agent"""
-    def __init__(self):
-        """Initializes the Minimax with alpha-beta agent class"""
-        super(AlphaBeta, self).__init__(AlgorithmType.AlphaBeta)
+    """
+    Minimax with alpha-beta pruning agent.
+    With a time limit, the agent searches anytime: it deepens the search one level at a time until the deadline
+    passes or MAX_ANYTIME_DEPTH is reached, and plays the best move of the deepest complete iteration.
+    """
+    def __init__(self, processes=1, time_limit=None, max_depth=MAX_ANYTIME_DEPTH):
+        """Initializes the Minimax with alpha-beta agent class, searching every move for at most time_limit seconds
+        (and max_depth levels) if time_limit is given"""
+        super(AlphaBeta, self).__init__(AlgorithmType.AlphaBeta, processes)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.deadline = None
+        self.nodes_num = 0  # the number of searched (not leaf) nodes expanded
+        self.cutoffs_num = 0  # the number of nodes whose remaining actions were pruned
+        self.move_stats = []  # the depth reached, nodes expanded, cutoffs and time of every anytime move
+
+    def get_policy_name(self) -> Optional[str]:
+        """Returns the name of the policy of the agent, naming its cached opening book and decision tree. The anytime
+        search depends on the speed and load of the machine, so its moves are never cached."""
+        if self.time_limit is not None:
+            return None
+        return super(AlphaBeta, self).get_policy_name()
 
     def adversarial_search(self, curr_depth, game: AbstractWordle, player_id, alpha=0.0, beta=0.0):
-        """simulating the game as a two player game, and returning a score based on the minimax with alpha-beta logic"""
-        legal_actions = get_legal_actions(game, player_id)
-        if curr_depth == self.depth * 2 or game.get_done() or not legal_actions:
+        """simulating the game as a two player game, and returning a score based on the minimax with alpha-beta logic.
+        Values outside of the alpha-beta window are stored in the transposition table as bounds"""
+        if curr_depth == self.depth * 2 or game.get_done():
+            return evaluation_function(game)
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+        key = self.get_table_key(curr_depth, game, player_id)
+        value = self.transposition_table.lookup(key, alpha, beta)
+        if value is not None:
+            return value
+        legal_actions = get_legal_actions(game) if player_id == MAX else get_pattern_buckets(game)
+        if not legal_actions:
             return evaluation_function(game)
 
+        self.nodes_num += 1
+        window = (alpha, beta)
         if player_id == MAX:
             for i, action in enumerate(legal_actions):
                 successor_game = generate_successor(game, agent_index=player_id, action=action)
                 result = self.adversarial_search(curr_depth + 1, successor_game, MIN, alpha, beta)
                 alpha = max(alpha, result)
                 if beta <= alpha:
+                    self.cutoffs_num += 1
                     break
-            return alpha
+            value = alpha
         else:
-            for i, action in enumerate(legal_actions):
-                successor_game = generate_successor(game, agent_index=player_id, action=action)
-                result = self.adversarial_search(curr_depth + 1, successor_game, MAX, alpha, beta)
+            for pattern, _, possible_ids in legal_actions:
+                result = self.search_pattern(curr_depth, game, pattern, possible_ids, alpha, beta)
                 beta = min(beta, result)
                 if beta <= alpha:
+                    self.cutoffs_num += 1
                     break
-            return beta
+            value = beta
+        self.transposition_table.store(key, value, *window)
+        return value
+
+    def choose_action(self, game: AbstractWordle):
+        """Returns the adversarial agent action, searching anytime if the agent has a time limit"""
+        if self.time_limit is None:
+            return super(AlphaBeta, self).choose_action(game)
+        return self.choose_action_anytime(game)
+
+    def score_root_actions(self, game: AbstractWordle, action_ids=None) -> np.ndarray:
+        """Returns the alpha-beta scores of the actions (words) with the given ids (the possible words by default),
+        split between self.processes processes which share the highest score found so far through shared memory (see
+        score_actions)"""
+        if action_ids is None:
+            action_ids = game.get_possible_ids()
+        if self.processes == 1:
+            return self.score_actions(action_ids, game)
+        high_score = SharedArray.create(np.full(1, -np.inf))
+        try:
+            return score_candidates(self.score_actions, action_ids, game, self.processes, high_score.get_descriptor())
+        finally:
+            high_score.release()
+
+    def score_actions(self, action_ids, game: AbstractWordle, high_score_descriptor=None) -> np.ndarray:
+        """
+        Returns the alpha-beta scores of the actions (words) with the given ids.
+        Every action is searched with alpha just below the highest score found so far - by this process, or by any of
+        the processes scoring the other actions, which share it in the shared array with the given descriptor and read
+        it before every action. Scores are integers (minus numbers of possible words), so the actions tying with the
+        best one are scored exactly and only the worse actions are cut off (with a score below the best), and the
+        action chosen is the one chosen by scoring every action exactly.
+        """
+        high_score = None if high_score_descriptor is None else SharedArray.attach(high_score_descriptor)
+        local_high_score = -np.inf
+        scores = np.empty(len(action_ids))
+        try:
+            for i, word in enumerate(game.get_vocabulary().get_words(action_ids)):
+                if high_score is not None:
+                    local_high_score = max(local_high_score, high_score.array[0])
+                successor_game = generate_successor(game, agent_index=MAX, action=word)
+                scores[i] = self.adversarial_search(1, successor_game, MIN, local_high_score - 1, np.inf)
+                if scores[i] > local_high_score:
+                    local_high_score = scores[i]
+                    # a race with another process may only lose a higher score, which weakens the pruning
+                    if high_score is not None and local_high_score > high_score.array[0]:
+                        high_score.array[0] = local_high_score
+        finally:
+            if high_score is not None:
+                high_score.release()
+        return scores
+
+    def search_root(self, game: AbstractWordle, action_ids, order, scores):
+        """Scores the actions (words) with the given ids in the given order at self.depth, filling in the scores.
+        Scores are integers (minus numbers of possible words), so with alpha just below the best score so far the
+        actions tying with it are scored exactly, and only the worse actions are cut off (with a score below it).
+        With more than one process, the actions are split between the processes as by score_root_actions (which
+        share the deadline of the agent), and the scores are filled in only if all of them finish in time (the nodes
+        they expand are not counted by this process)"""
+        if self.processes > 1:
+            scores[order] = self.score_root_actions(game, action_ids[order])
+            return
+        words = game.get_vocabulary().words
+        high_score = -np.inf
+        for index in order.tolist():
+            successor_game = generate_successor(game, agent_index=MAX, action=words[action_ids[index]])
+            scores[index] = self.adversarial_search(1, successor_game, MIN, high_score - 1, np.inf)
+            high_score = max(high_score, scores[index])
+
+    def search_root_buckets(self, game: AbstractWordle, action_ids, scores):
+        """Scores the actions (words) with the given ids at depth 1 from the sizes of the largest buckets they split
+        the possible words into, in batches, filling in the scores. Used in games whose patterns depend only on the
+        secret word, where it gives the scores of search_root without expanding any node"""
+        batch_size = max(1, MAX_BATCH_PAIRS // max(1, len(game.get_possible_ids())))
+        for start in range(0, len(action_ids), batch_size):
+            if time.time() > self.deadline:
+                raise SearchTimeout()
+            largest_buckets = get_largest_buckets(game, action_ids[start:start + batch_size])
+            scores[start:start + batch_size] = evaluation_function_possible_num(largest_buckets)
+
+    def choose_action_anytime(self, game: AbstractWordle):
+        """
+        Returns the adversarial agent action by iterative deepening until the deadline.
+        The first iteration scores the actions from the sizes of their largest buckets when the patterns depend only on
+        the secret word. Every other iteration searches the actions in the order of the scores of the previous one, and
+        the values searched by the previous iterations are reused from the transposition table. If the deadline passes
+        during an iteration, the best action of the previous one is played, or the best action scored so far if no
+        iteration was completed. The actions are chosen as by the fixed depth search - the first of the best actions,
+        or a random action if none was scored.
+        """
+        start = time.time()
+        self.deadline = start + self.time_limit
+        nodes_num, cutoffs_num = self.nodes_num, self.cutoffs_num
+        possible_words = game.get_possible_words()
+        best_action = random.choice(possible_words)
+        action_ids = game.get_possible_ids()
+        order = np.arange(len(action_ids))
+
+        fixed_depth = self.depth
+        best_scores = None
+        reached_depth = 0
+        for depth in range(1, self.max_depth + 1):
+            self.depth = depth
+            scores = np.full(len(action_ids), -np.inf)
+            try:
+                if depth == 1 and game.fixed_patterns:
+                    self.search_root_buckets(game, action_ids, scores)
+                else:
+                    self.search_root(game, action_ids, order, scores)
+            except SearchTimeout:
+                if best_scores is None:
+                    best_scores = scores
+                break
+            best_scores = scores
+            reached_depth = depth
+            order = np.argsort(-scores, kind='stable')
+            if scores.max() >= evaluation_function_possible_num(1):  # no deeper search finds a better action
+                break
+        self.depth = fixed_depth
+        self.deadline = None
+
+        self.move_stats.append({"depth": reached_depth, "nodes": self.nodes_num - nodes_num,
+                                "cutoffs": self.cutoffs_num - cutoffs_num, "time": time.time() - start})
+        high_score = -np.inf
+        for word, minimax_score in zip(possible_words, best_scores.tolist()):
+            if high_score < minimax_score:
+                high_score = minimax_score
+                best_action = word
+        return best_action
+
+    def get_search_stats(self):
+        """Returns the hits and misses of the transposition table, and the statistics of the anytime moves"""
+        stats = super(AlphaBeta, self).get_search_stats()
+        if self.move_stats:
+            depths = [move["depth"] for move in self.move_stats]
+            stats.update({"# Anytime moves": len(self.move_stats),
+                          "Avg. depth reached": f"{np.mean(depths):.3f}",
+                          "Min depth reached": min(depths),
+                          "Avg. nodes expanded": f"{np.mean([move['nodes'] for move in self.move_stats]):.1f}",
+                          "Avg. cutoffs": f"{np.mean([move['cutoffs'] for move in self.move_stats]):.1f}",
+                          "Max move time": f"{max(move['time'] for move in self.move_stats):.3f} sec"})
+        return stats
 
 
 class Expectimax(AdversarialAgent):
     """Expectimax agent"""
-    def __init__(self):
+    def __init__(self, processes=1):
         """Initializes the Expectimax agent class"""
-        super(Expectimax, self).__init__(AlgorithmType.Expectimax)
-        self.opening_guesses = {GameType.BasicWordle: "lares", GameType.YellowWordle: "arise",
-                                GameType.NoisyWordle: "lares", GameType.Absurdle: "lares",
-                                GameType.FakeVocabularyWordle: "oydpn",
-                                GameType.RealVocabularyWordle: {1000: "rates",
-                                                                2000: "tares",
-                                                                3000: "tares",
-                                                                4000: "soare",
-                                                                5000: "tares",
-                                                                6000: "lares",
-                                                                7000: "rales",
-                                                                8000: "lares",
-                                                                9000: "lares",
-                                                                10000: "lares",
-                                                                11000: "lares",
-                                                                12000: "lares",
-                                                                12972: "lares"}}
-        self.absurdle_computed_second_guess = "mount"
+        super(Expectimax, self).__init__(AlgorithmType.Expectimax, processes=processes)
 
     def adversarial_search(self, curr_depth, game: AbstractWordle, player_id, alpha=0.0, beta=0.0):
         """simulating the game as a two player game, and returning a score based on the expectimax logic"""
-        legal_actions = get_legal_actions(game, player_id)
-        if curr_depth == self.depth * 2 or game.get_done() or not legal_actions:
+        if curr_depth == self.depth * 2 or game.get_done():
+            return evaluation_function(game)
+        key = self.get_table_key(curr_depth, game, player_id)
+        value = self.transposition_table.lookup(key)
+        if value is not None:
+            return value
+        legal_actions = get_legal_actions(game) if player_id == MAX else get_pattern_buckets(game)
+        if not legal_actions:
             return evaluation_function(game)
 
         result_lst = []
         result_counter = util.Counter()
+        patterns_counter = util.Counter()
         for i, action in enumerate(legal_actions):
-            successor_game = generate_successor(game, agent_index=player_id, action=action)
             if player_id == MAX:
+                successor_game = generate_successor(game, agent_index=player_id, action=action)
                 result_lst.append(self.adversarial_search(curr_depth + 1, successor_game, MIN))
             else:
-                result_counter[tuple(action)] = (self.adversarial_search(curr_depth + 1, successor_game, MAX))
-        return max(result_lst) if player_id == MAX else compute_expected_min(result_counter, legal_actions)
+                pattern, count, possible_ids = action
+                patterns_counter[pattern] = count
+                result_counter[pattern] = self.search_pattern(curr_depth, game, pattern, possible_ids)
+        value = max(result_lst) if player_id == MAX else compute_expected_min(result_counter, patterns_counter)
+        self.transposition_table.store(key, value)
+        return value
+
+
+class SparseExpectimax(Expectimax):
+    """
+    Expectimax estimating the expected score of every guess from a sample of the secret words, for searching deeper
+    than Expectimax on large sets of possible words.
+    Every chance (MIN) node samples sample_size secret words from the possible words (with replacement, uniformly,
+    so every pattern is weighted by the size of its bucket, or by the frequency priors of the words), and averages the
+    scores of the buckets of the sampled patterns. The sample of a set of possible words is drawn by an RNG seeded
+    with the seed and the hash of the words, so the sibling chance nodes (the guesses of the same MAX node) share the
+    sample, and the scores do not depend on the order of the search or on the processes scoring the actions.
+    When there are at most sample_size possible words, every one of them is used, so the score is exact. The MAX
+    nodes above the last chance nodes are scored exactly, for all their guesses at once, from the sizes of their
+    buckets, so a depth 2 search samples only the patterns of the guesses of the root.
+    Games whose patterns do not depend only on the secret word are searched by Expectimax.
+    """
+    def __init__(self, processes=1, depth=2, sample_size=DEFAULT_SAMPLE_SIZE, use_priors=False, seed=0):
+        """Initializes the sparse Expectimax agent class with its depth, its sample size (trading accuracy for speed),
+        whether the secret words are sampled by their frequency priors, and the seed of its samples"""
+        super(SparseExpectimax, self).__init__(processes)
+        self.type = AlgorithmType.SparseExpectimax
+        self.depth = depth
+        self.sample_size = sample_size
+        self.use_priors = use_priors
+        self.seed = seed
+        self._samples = {}  # the hash of the possible words and their sample, by the depth of the chance node
+
+    def get_policy_name(self) -> str:
+        """Returns the name of the policy of the agent, naming its cached opening book and decision tree."""
+        priors_name = "_priors" if self.use_priors else ""
+        return f"{self.type.name.lower()}_depth{self.depth}_samples{self.sample_size}{priors_name}_seed{self.seed}"
+
+    def get_sample(self, curr_depth, game: AbstractWordle):
+        """Returns the ids of the secret words sampled from the possible words of the chance node and their weights,
+        reusing the sample of the previous chance node at the same depth if it has the same possible words"""
+        possible_hash = game.get_possible_hash()
+        if curr_depth in self._samples and self._samples[curr_depth][0] == possible_hash:
+            return self._samples[curr_depth][1]
+        possible_ids = game.get_possible_ids()
+        probs = None
+        if self.use_priors:
+            priors = get_priors(game.get_vocabulary())[possible_ids].astype(np.float64)
+            probs = priors / priors.sum()
+        if len(possible_ids) <= self.sample_size:
+            sample = (possible_ids, np.ones(len(possible_ids)) if probs is None else probs)
+        else:
+            rng = np.random.default_rng([self.seed, int.from_bytes(possible_hash[:8], 'little')])
+            sample = (rng.choice(possible_ids, size=self.sample_size, p=probs), np.ones(self.sample_size))
+        self._samples[curr_depth] = (possible_hash, sample)
+        return sample
+
+    def get_sampled_expectation(self, curr_depth, game: AbstractWordle):
+        """Returns the expected score of the chance node over the patterns of its sampled secret words, searching the
+        bucket of the possible words of every sampled pattern once"""
+        guess, _ = game.states[-1]
+        pattern_matrix = game.get_pattern_matrix()
+        possible_ids = game.get_possible_ids()
+        sample_ids, sample_weights = self.get_sample(curr_depth, game)
+        pattern_weights = np.bincount(pattern_matrix.get_codes(guess, sample_ids), weights=sample_weights,
+                                      minlength=PATTERNS_NUM)
+        possible_codes = pattern_matrix.get_codes(guess, possible_ids)
+        expected_score = 0.0
+        for pattern in np.flatnonzero(pattern_weights).tolist():
+            bucket = possible_ids[possible_codes == pattern]
+            expected_score += pattern_weights[pattern] * self.search_pattern(curr_depth, game, pattern, bucket)
+        return expected_score / pattern_weights.sum()
+
+    def adversarial_search(self, curr_depth, game: AbstractWordle, player_id, alpha=0.0, beta=0.0):
+        """simulating the game as a two player game, and returning a score based on the sparse expectimax logic"""
+        if not game.fixed_patterns:
+            return super(SparseExpectimax, self).adversarial_search(curr_depth, game, player_id, alpha, beta)
+        if curr_depth == self.depth * 2 or game.get_done():
+            return evaluation_function(game)
+        key = self.get_table_key(curr_depth, game, player_id)
+        value = self.transposition_table.lookup(key)
+        if value is not None:
+            return value
+        if not len(game.get_possible_ids()):
+            return evaluation_function(game)
+
+        if player_id == MAX and curr_depth + 2 == self.depth * 2:
+            expected_buckets = get_expected_buckets(game, game.get_possible_ids())
+            value = float(evaluation_function_possible_num(expected_buckets).max())
+        elif player_id == MAX:
+            value = -np.inf
+            for action in get_legal_actions(game):
+                successor_game = generate_successor(game, agent_index=player_id, action=action)
+                value = max(value, self.adversarial_search(curr_depth + 1, successor_game, MIN))
+        else:
+            value = self.get_sampled_expectation(curr_depth, game)
+        self.transposition_table.store(key, value)
+        return value
 
 
 def compute_expected_min(result_counter, patterns_counter):
@@ -195,8 +538,12 @@ def evaluation_function(game: AbstractWordle):
     The evaluation function used by all adverserial agents, baes on the number of the remaining words.
     Returns the number of remaining words * (-1)
     """
-    remaining_words = len(game.get_possible_words())
-    return -remaining_words
+    return evaluation_function_possible_num(len(game.get_possible_ids()))
+
+
+def evaluation_function_possible_num(possible_words_num):
+    """Returns the evaluation_function of a game with the given number of possible words."""
+    return -possible_words_num
 
 
 def evaluation_function_turn_num(game: AbstractWordle):
@@ -209,7 +556,9 @@ def evaluation_function_game_score(game: AbstractWordle):
     score = 0
     game_state = game.get_game_state()
     for _, pattern in game_state:
-        for placing in pattern:
+        if pattern is None:  # the last guess of the agent that was not answered yet
+            continue
+        for placing in PATTERN_PLACINGS[pattern]:
             if placing == Placing.correct.value:
                 score += 10
             elif placing == Placing.misplaced.value:
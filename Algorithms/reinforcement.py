@@ -1,8 +1,16 @@
 from utils import util
 from Algorithms.algorithm import Algorithm
 from WordleGames.abstract_wordle import AbstractWordle
-from utils.common import Placing, AlgorithmType, GameType
+from utils.common import Placing, AlgorithmType, GameType, PATTERN_PLACINGS, PATTERNS_NUM, LETTERS_NUM
+from utils.q_table import ActionRanking, create_q_table, remap_q_table
+from utils.model_registry import AGENT_TABULAR, AGENT_APPROXIMATE, REWARD_CONSTANT, REWARD_TURN, save_model, \
+    find_model_name, load_manifest, load_model, load_model_vocabulary, get_checkpoint_path, save_checkpoint, \
+    load_checkpoint
+from utils.vocabulary import Vocabulary
+from utils.parallel import starmap_games
 from tqdm import tqdm
+import numpy as np
+import os
 import random
 import pickle
 
@@ -15,71 +23,207 @@ GREY_REWARD = -5
 # Features for approximate Q Learning:
 MATCHES = 0
 DIFFERENCES = 1
+FEATURES_NUM = 2
+
+# the number of letters placed the same in every pair of patterns, by their codes
+_placings = np.array(PATTERN_PLACINGS)
+PLACING_MATCHES = (_placings[:, None, :] == _placings[None, :, :]).sum(axis=2)
+
+# Ways of merging the agents trained in parallel:
+MERGE_VISITS = "visits"  # average every Q-value weighted by the number of updates of every agent
+MERGE_AVERAGE = "average"  # average every Q-value (or weight)
+
+# Hyper-parameters of the training:
+ALPHA = 0.2
+DISCOUNT = 0.8
+EPSILON_MIN = 0.05
+MERGE_EPISODES = 1000  # the number of episodes every training process plays between merges of the agents
+CHECKPOINT_EPISODES = 5000  # the number of episodes between the checkpoints of a training run
+TRAIN_BATCH_SIZE = 128  # the number of episodes the batched training of the tabular agent plays in lockstep
+MIN_SORTED_GUESSES = 16  # the number of episodes of a batch making the same first guess worth sorting its codes
 
 
 class QLearningAgent:
-    """Classic Q-learning agent"""
-    def __init__(self):
-        """Initializing Q-values table."""
-        self.Q_values = util.Counter()
+    """
+    Classic Q-learning agent, holding its Q-values in a dense table indexed by (state id, word id).
+    Reading Q-values never changes the table, and the number of updates of every entry is counted, so the entries the
+    agent has actually learned are known.
+    """
+    kind = AGENT_TABULAR
+
+    def __init__(self, vocabulary: Vocabulary):
+        """Initializing Q-values table over the words of the vocabulary, and the update counts of its entries."""
+        self.vocabulary = vocabulary
+        self.Q_values = create_q_table(vocabulary)
+        self.visits = np.zeros(self.Q_values.shape, dtype=np.uint32)
+        self.rankings = {}  # the action rankings of the states played by get_ranked_policy, until the table changes
 
     def get_q_value(self, state, action):
         """Returns the Q-value of a given (state, action) pair."""
-        return self.Q_values[(state, action)]
+        return self.Q_values[state, self.vocabulary.get_id(action)]
+
+    def get_q_values(self, state, action_ids) -> np.ndarray:
+        """Returns the Q-values of the given state and every action (word) with the given ids."""
+        return self.Q_values[state, action_ids]
 
-    def get_value(self, state, actions):
+    def get_value(self, state, action_ids):
         """Returns the action with the maximal Q-value of a given state over the legal actions."""
-        if not actions:
+        if not len(action_ids):
             return 0.0
-        max_action = float('-inf')
-        for action in actions:
-            if max_action < self.get_q_value(state, action):
-                max_action = self.get_q_value(state, action)
-        return max_action
-
-    def get_policy(self, state, actions):
-        """Computes the best action to take in a given state over the legal actions."""
-        max_action = float('-inf')
-        actions_lst = []
-        for action in actions:
-            if max_action < self.get_q_value(state, action):
-                max_action = self.get_q_value(state, action)
-                actions_lst = [action]
-            elif max_action == self.get_q_value(state, action):
-                actions_lst.append(action)
-        return random.choice(actions_lst)
-
-    def get_q_action(self, state, actions, epsilon):
+        return self.get_q_values(state, action_ids).max()
+
+    def get_policy(self, state, action_ids):
+        """Computes the best action to take in a given state over the legal actions, breaking ties at random."""
+        q_values = self.get_q_values(state, action_ids)
+        best_indices = np.flatnonzero(q_values == q_values.max())
+        return self.vocabulary.words[action_ids[random.choice(best_indices.tolist())]]
+
+    def get_ranked_policy(self, state, action_ids):
+        """Computes the best action to take in a given state over the legal actions like get_policy, from the ranking of
+        the words by their Q-values in the state, compiled on its first call (after every change of the table)."""
+        if state not in self.rankings:
+            self.rankings[state] = ActionRanking(np.asarray(self.Q_values[state]), self.vocabulary.all_ids)
+        best_ids = self.rankings[state].get_best_ids(action_ids)
+        return self.vocabulary.words[random.choice(best_ids.tolist())]
+
+    def get_q_action(self, state, action_ids, epsilon):
         """Computes the best action to take in a given state by using epsilon to govern exploration vs exploitation"""
-        if not actions:
+        if not len(action_ids):
             return None
         if util.flipCoin(epsilon):
-            return random.choice(actions)
-        return self.get_policy(state, actions)
-
-    def update(self, state, action, next_state, reward, alpha, discount, actions):
+            return self.vocabulary.words[random.choice(action_ids.tolist())]
+        return self.get_policy(state, action_ids)
+
+    def get_shared_q_actions(self, state, action_ids, epsilons, rng: np.random.Generator) -> np.ndarray:
+        """Returns the epsilon-greedy actions (word ids) of a batch of episodes in the same state with the same legal
+        actions, every episode exploring with its own epsilon and breaking ties between the best actions at random."""
+        q_values = self.get_q_values(state, action_ids)
+        best_ids = action_ids[q_values == q_values.max()]
+        explore = rng.random(len(epsilons)) < epsilons
+        return np.where(explore, rng.choice(action_ids, len(epsilons)), rng.choice(best_ids, len(epsilons)))
+
+    def get_batch_q_actions(self, state, offsets, action_ids, epsilons, rng: np.random.Generator) -> np.ndarray:
+        """
+        Returns the epsilon-greedy actions (word ids) of a batch of episodes in the same state, whose legal actions
+        are concatenated in action_ids - those of the i-th episode from offsets[i] to offsets[i + 1] (never empty).
+        Every episode explores with its own epsilon, and breaks ties between its best actions at random.
+        """
+        counts = np.diff(offsets)
+        episodes = np.repeat(np.arange(len(counts)), counts)
+        q_values = self.get_q_values(state, action_ids)
+        best = q_values == np.maximum.reduceat(q_values, offsets[:-1])[episodes]
+        # a random key for every best action, so the best action with the highest key is a uniform choice among them
+        keys = np.where(best, rng.random(len(action_ids)), -1.0)
+        chosen = np.flatnonzero(keys == np.maximum.reduceat(keys, offsets[:-1])[episodes])
+        greedy_choices = chosen[np.unique(episodes[chosen], return_index=True)[1]]
+        random_choices = offsets[:-1] + (rng.random(len(counts)) * counts).astype(np.intp)
+        explore = rng.random(len(counts)) < epsilons
+        return action_ids[np.where(explore, random_choices, greedy_choices)]
+
+    def update(self, state, action, next_state, reward, alpha, discount, action_ids):
         """Updates the Q-table given the current state, the action to take, the new state and the hyper-parameters."""
-        self.Q_values[(state, action)] = self.Q_values[(state, action)] + alpha * \
-                                         (reward+discount*self.get_value(next_state, actions)-self.Q_values[(state, action)])
+        action_id = self.vocabulary.get_id(action)
+        self.Q_values[state, action_id] = self.Q_values[state, action_id] + alpha * \
+            (reward + discount * self.get_value(next_state, action_ids) - self.Q_values[state, action_id])
+        self.visits[state, action_id] += 1
+        self.rankings.clear()
 
-    def save_agent(self, game_type: GameType):
-        agent_game = 'wordle' if game_type != GameType.FakeVocabularyWordle else 'fake'
-        with open(f'Algorithms/saved_rl_agents/{agent_game}.pkl', 'wb') as f:
-            pickle.dump(self.Q_values, f)
+    def update_batch(self, state, action_ids, targets, alpha):
+        """
+        Updates the Q-values of the actions (word ids) of a batch of episodes in the same state towards their targets
+        (the reward plus the discounted value of the next state). An action taken by several episodes is updated as
+        if their updates were applied one after another, in the order of the episodes, with the targets given.
+        """
+        order = np.argsort(action_ids, kind='stable')
+        sorted_ids = action_ids[order]
+        group_starts = np.flatnonzero(np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1])))
+        group_sizes = np.diff(np.append(group_starts, len(sorted_ids)))
+        # the number of updates of the same action after every update, which shrink its weight by (1 - alpha) each
+        later_updates = np.repeat(group_starts + group_sizes, group_sizes) - 1 - np.arange(len(sorted_ids))
+        weighted_targets = alpha * (1 - alpha) ** later_updates * targets[order]
+        group_ids = sorted_ids[group_starts]
+        self.Q_values[state, group_ids] = (1 - alpha) ** group_sizes * self.Q_values[state, group_ids] + \
+            np.add.reduceat(weighted_targets, group_starts)
+        self.visits[state, group_ids] += group_sizes.astype(self.visits.dtype)
+        self.rankings.clear()
+
+    def get_table_stats(self):
+        """Returns the number of entries in the Q-table, the number of them with a learned (non-zero) Q-value and the
+        number of them updated by this agent, and the memory of the table and its update counts."""
+        return {"# Q-table entries": self.Q_values.size,
+                "# Non-zero Q-values": int(np.count_nonzero(self.Q_values)),
+                "# Updated Q-values": int(np.count_nonzero(self.visits)),
+                "Q-table memory (KB)": f"{(self.Q_values.nbytes + self.visits.nbytes) / 1024:.1f}"}
+
+    def get_model(self):
+        """Returns the model of the agent - its Q-table."""
+        return np.asarray(self.Q_values)
+
+    def set_model(self, model):
+        """Sets the Q-table of the agent to the given model (without copying it), with no updates."""
+        self.Q_values = model
+        self.visits = np.zeros(self.Q_values.shape, dtype=np.uint32)
+        self.rankings.clear()
+
+    def get_training_state(self):
+        """Returns the Q-values of the agent and the update counts of its entries, by name."""
+        return {"q_values": np.asarray(self.Q_values), "visits": self.visits}
+
+    def set_training_state(self, training_state):
+        """Sets the Q-values of the agent and the update counts of its entries from a training state."""
+        self.Q_values = np.array(training_state["q_values"])
+        self.visits = np.array(training_state["visits"], dtype=np.uint32)
+        self.rankings.clear()
+
+    def merge_training_states(self, training_states, merge=MERGE_VISITS):
+        """
+        Merges the training states of copies of the agent (see train_chunk) which trained on chunks of episodes into
+        the agent. With MERGE_VISITS every Q-value is the average of the Q-values of the copies weighted by the
+        number of times each of them updated it (and is kept if none did), and with MERGE_AVERAGE it is their average.
+        """
+        q_values = np.stack([training_state["q_values"] for training_state in training_states])
+        visits = np.stack([training_state["visits"] for training_state in training_states])
+        total_visits = visits.sum(axis=0)
+        if merge == MERGE_VISITS:
+            weighted_sums = (q_values * visits).sum(axis=0)
+            self.Q_values = np.where(total_visits > 0, weighted_sums / np.maximum(total_visits, 1), self.Q_values)
+        else:
+            self.Q_values = q_values.mean(axis=0)
+        self.visits = self.visits + total_visits.astype(np.uint32)
+        self.rankings.clear()
 
-    def load_agent(self, game_type: GameType):
-        agent_game = 'wordle' if game_type != GameType.FakeVocabularyWordle else 'fake'
-        with open(f'Algorithms/saved_rl_agents/{agent_game}.pkl', 'rb') as f:
-            self.Q_values = pickle.load(f)
+    def save_agent(self, game_type: GameType, reward=REWARD_CONSTANT):
+        """Saves the Q-table of the agent as the model of the game type and reward function."""
+        save_model(self.get_model(), self.kind, game_type, self.vocabulary, reward)
+
+    def load_agent(self, model_name):
+        """
+        Loads the Q-table of the agent from the saved model with the given name (read-only, the agents training on
+        chunks of episodes update copies of it). A model saved for other words is mapped to the words of the agent by
+        word, and the words it does not know get the Q-value 0, as actions never updated.
+        """
+        q_table = load_model(model_name)
+        if load_manifest()[model_name]["vocabulary_hash"] != self.vocabulary.get_hash():
+            q_table = remap_q_table(q_table, load_model_vocabulary(model_name), self.vocabulary)
+        self.set_model(q_table)
 
 
 class ApproximateQAgent(QLearningAgent):
-    """Approximate Q-learning agent."""
-    def __init__(self, get_pattern_func):
-        """Initializing the weights and a function to calculate patterns of guesses."""
-        super(ApproximateQAgent, self).__init__()
+    """
+    Approximate Q-learning agent.
+    The features of all the legal actions are computed together, from the codes of the patterns of the guess of the
+    state in the pattern matrix of the game (or with get_pattern, in games whose patterns are not fixed by the secret
+    word), so the Q-values of the actions are a product of a features block with the weights.
+    """
+    kind = AGENT_APPROXIMATE
+
+    def __init__(self, vocabulary: Vocabulary, get_pattern_func, get_pattern_matrix_func=None):
+        """Initializing the weights, a function to calculate patterns of guesses, and a function returning the pattern
+        matrix of the game (None if its patterns are not fixed by the secret word)."""
+        self.vocabulary = vocabulary
         self.weights = util.Counter()
         self.get_pattern = get_pattern_func
+        self.get_pattern_matrix = get_pattern_matrix_func
 
     def get_features(self, state, action):
         """Returns the features of a given (state, action) pair by calculating the pattern of the action, and
@@ -94,20 +238,42 @@ class ApproximateQAgent(QLearningAgent):
 
         guess, pattern = state
         next_pattern = self.get_pattern(guess, action)
-        for placing1, placing2 in zip(pattern, next_pattern):
-            if placing1 == placing2:
-                features[MATCHES] += 1
-            else:
-                features[DIFFERENCES] += 1
+        features[MATCHES] = int(PLACING_MATCHES[pattern, next_pattern])
+        features[DIFFERENCES] = LETTERS_NUM - features[MATCHES]
 
         features.divideAll(5.0)
         return features
 
+    def get_features_block(self, state, action_ids) -> np.ndarray:
+        """Returns the features of the given state and every action (word) with the given ids, as a
+        len(action_ids) x FEATURES_NUM array."""
+        features = np.zeros((len(action_ids), FEATURES_NUM))
+        if not state:
+            return features
+
+        guess, pattern = state
+        if self.get_pattern_matrix is not None:
+            next_patterns = self.get_pattern_matrix().get_codes(guess, action_ids)
+        else:
+            next_patterns = np.array([self.get_pattern(guess, action)
+                                      for action in self.vocabulary.get_words(action_ids)], dtype=np.intp)
+        matches = PLACING_MATCHES[pattern, next_patterns]
+        features[:, MATCHES] = matches / 5.0
+        features[:, DIFFERENCES] = (LETTERS_NUM - matches) / 5.0
+        return features
+
     def get_q_value(self, state, action):
         """Returns the approximate Q-value of a given (state, action) pair by computing the dot product between
          the features and the weights."""
         return self.get_features(state, action) * self.weights
 
+    def get_q_values(self, state, action_ids) -> np.ndarray:
+        """Returns the approximate Q-values of the given state and every action (word) with the given ids, the
+        product of their features block with the weights (summed feature by feature, as in get_q_value)."""
+        features = self.get_features_block(state, action_ids)
+        return features[:, MATCHES] * self.weights.get(MATCHES, 0) + \
+            features[:, DIFFERENCES] * self.weights.get(DIFFERENCES, 0)
+
     def update(self, state, action, next_state, reward, alpha, discount, legal_actions):
         """Updates the current weights given the current state, the action to take and the new state."""
         features = self.get_features(state, action)
@@ -115,85 +281,298 @@ class ApproximateQAgent(QLearningAgent):
         for i in features:
             self.weights[i] = self.weights[i] + alpha * correction * features[i]
 
-    def save_agent(self, game_type: GameType):
-        with open('Algorithms/saved_rl_agents/approximate.pkl', 'wb') as f:
-            pickle.dump(self.weights, f)
+    def get_table_stats(self):
+        """Returns the number of weights of the agent and the size they are saved in."""
+        return {"# Weights": len(self.weights), "Weights size (B)": len(pickle.dumps(self.weights))}
+
+    def get_model(self):
+        """Returns the model of the agent - its weights, as an array."""
+        return np.array([self.weights[MATCHES], self.weights[DIFFERENCES]])
+
+    def set_model(self, model):
+        """Sets the weights of the agent from the given model."""
+        self.weights = util.Counter()
+        self.weights[MATCHES], self.weights[DIFFERENCES] = np.asarray(model).tolist()
+
+    def get_training_state(self):
+        """Returns the weights of the agent as an array, by name."""
+        return {"weights": self.get_model()}
+
+    def set_training_state(self, training_state):
+        """Sets the weights of the agent from a training state."""
+        self.set_model(training_state["weights"])
+
+    def merge_training_states(self, training_states, merge=MERGE_VISITS):
+        """Merges the training states of copies of the agent which trained on chunks of episodes into the agent, by
+        averaging their weights (every copy trains on the same number of episodes, so MERGE_VISITS weights them
+        equally too)."""
+        self.set_training_state({"weights": np.mean([training_state["weights"]
+                                                     for training_state in training_states], axis=0)})
 
-    def load_agent(self, game_type: GameType):
-        with open('Algorithms/saved_rl_agents/approximate.pkl', 'rb') as f:
-            self.weights = pickle.load(f)
+    def load_agent(self, model_name):
+        """Loads the weights of the agent from the saved model with the given name (the weights do not depend on the
+        words the model was saved for)."""
+        self.set_model(load_model(model_name))
 
 
 class Reinforcement(Algorithm):
     """A reinforcement algorithm to play a Wordle type game"""
-    def __init__(self, game: AbstractWordle, train=False, approximate=False):
+    def __init__(self, game: AbstractWordle, train=False, approximate=False, reward=REWARD_CONSTANT,
+                 batch_size=TRAIN_BATCH_SIZE, processes=1, merge=MERGE_VISITS):
         """
         Initializes the algorithm guess count, game type, the agent being used (approximate or not), and trains for a
-        fixed number of episodes.
+        fixed number of episodes. Otherwise every game is played by the saved agent of its own type and words (and the
+        reward function), loaded when it first plays.
         :param game: An AbstractWordleLogic type game to simulate training and decide on the type of agent to use.
+        :param reward: The reward function the agent is trained with (REWARD_CONSTANT for constant_rewards or
+        REWARD_TURN for turn_rewards).
+        :param batch_size: The number of episodes the tabular agent plays in lockstep when training (1 for playing
+        them one after another with the game itself).
+        :param processes: The number of processes training copies of the agent in parallel.
+        :param merge: How the copies of the agent are merged (MERGE_VISITS or MERGE_AVERAGE).
         """
         super(Reinforcement, self).__init__(AlgorithmType.Reinforcement)
         self.game = game
         self.approximate = approximate
+        self.reward = reward
+        self.batch_size = batch_size
+        self.processes = processes
+        self.merge = merge
+
+        self.agent = self.create_agent(game)  # the agent trained on the game
+        self.playing_agents = {}  # the agents playing the games of every type and words, by (game type, words hash)
+        self.playing_agent = None  # the agent which played last
+        if train:
+            self.train()
 
+    def create_agent(self, game: AbstractWordle):
+        """Returns a new agent over the words (and with the patterns) of the game."""
         if not self.approximate:
-            self.agent = QLearningAgent()
-        else:
-            self.agent = ApproximateQAgent(game.get_pattern)
+            return QLearningAgent(game.get_vocabulary())
+        return ApproximateQAgent(game.get_vocabulary(), game.get_pattern,
+                                 game.get_pattern_matrix if game.fixed_patterns else None)
 
-        if train:
-            self.train()
-        else:
-            self.agent.load_agent(self.game.get_type())
-
-    def train(self):
-        """Trains the agent for a given number of episodes.
-        Decides on the hyper-parameters, simulates games, calculates rewards and updates the agent."""
-        # hyper-parameters
-        alpha = 0.2
-        discount = 0.8
-        epsilon = 1.0
-        epsilon_min = 0.05
+    def get_playing_agent(self, game: AbstractWordle):
+        """
+        Returns the agent playing the game, made on the first game of its type and words. It is the agent trained on
+        the game, if it was, and otherwise an agent loaded from the saved model of the type and words of the game (see
+        find_model_name), so every game variant is played by its own model whichever game the algorithm was made with.
+        """
+        key = (game.get_type(), game.get_vocabulary().get_hash())
+        if key not in self.playing_agents:
+            model_name = find_model_name(self.agent.kind, game.get_type(), game.get_vocabulary(), self.reward)
+            if model_name is None:
+                raise FileNotFoundError(f"No {self.agent.kind} agent trained with {self.reward} rewards was saved")
+            agent = self.create_agent(game)
+            agent.load_agent(model_name)
+            self.playing_agents[key] = agent
+        self.playing_agent = self.playing_agents[key]
+        return self.playing_agent
+
+    def train(self, num_episodes=None):
+        """
+        Trains the agent for a given number of episodes.
+        Decides on the hyper-parameters, simulates games, calculates rewards and updates the agent.
+        Every self.processes processes train copies of the agent on MERGE_EPISODES episodes each (with independent
+        seeds, and the epsilons of their episodes), which are merged into the agent. Only the model of the agent and
+        the parameters of their chunks are sent to the processes, which rebuild the agent over the words of the game
+        in shared memory (see train_chunk). Every CHECKPOINT_EPISODES
+        episodes the agent, the number of episodes played and the seed of the run are saved to a checkpoint, and a
+        run stopped before its end resumes from its last checkpoint (with the same number of processes, it ends with
+        the agent of a run which was not stopped).
+        """
+        # hyper-parameters (with ALPHA, DISCOUNT and EPSILON_MIN)
         epsilon_decay = 0.9999 if not self.approximate else 0.995
-        num_episodes = 40000 if not self.approximate else 1000
+        if num_episodes is None:
+            num_episodes = 40000 if not self.approximate else 1000
+
+        checkpoint_path = get_checkpoint_path(self.agent.kind, self.game.get_type(), self.game.get_vocabulary(),
+                                              self.reward)
+        episode, seed = 0, random.getrandbits(32)
+        if os.path.isfile(checkpoint_path):
+            checkpoint = load_checkpoint(checkpoint_path)
+            episode, seed = int(checkpoint.pop("episode")), int(checkpoint.pop("seed"))
+            self.agent.set_training_state(checkpoint)
+            print(f"Resuming training from the checkpoint after {episode} episodes")
+        print_table_stats("Before training", self.agent.get_table_stats())
+
+        last_checkpoint = episode
+        with tqdm(total=num_episodes, initial=episode) as progress:
+            while episode < num_episodes:
+                round_episodes = min(self.processes * MERGE_EPISODES, num_episodes - episode)
+                starts = np.linspace(episode, episode + round_episodes, self.processes + 1).astype(int)
+                seeds = np.random.SeedSequence([seed, episode]).generate_state(self.processes).tolist()
+                model = self.agent.get_model()
+                chunks = [(self.game, self.approximate, self.reward, self.batch_size, model, int(start),
+                           int(end - start), epsilon_decay, chunk_seed)
+                          for start, end, chunk_seed in zip(starts[:-1], starts[1:], seeds) if end > start]
+                training_states = starmap_games(train_chunk, self.game, self.processes, chunks)
+                self.agent.merge_training_states(training_states, self.merge)
+                episode += round_episodes
+                progress.update(round_episodes)
+                if episode - last_checkpoint >= CHECKPOINT_EPISODES and episode < num_episodes:
+                    save_checkpoint(checkpoint_path, dict(self.agent.get_training_state(), episode=episode, seed=seed))
+                    last_checkpoint = episode
+
+        self.agent.save_agent(self.game.get_type(), self.reward)
+        self.playing_agents = {(self.game.get_type(), self.game.get_vocabulary().get_hash()): self.agent}
+        if os.path.isfile(checkpoint_path):
+            os.remove(checkpoint_path)
+        print(f"Training completed over {num_episodes} episodes")
+        print_table_stats("After training", self.agent.get_table_stats())
+
+    def train_chunk(self, start_episode, num_episodes, epsilon_decay):
+        """Trains the agent over the given number of episodes, starting at the given episode of the run (which decides
+        their epsilons)."""
+        if self.batch_size > 1 and not self.approximate and self.game.fixed_patterns:
+            self.train_batched(start_episode, num_episodes, epsilon_decay)
+        else:
+            self.train_episodes(start_episode, num_episodes, epsilon_decay)
 
-        for _ in tqdm(range(num_episodes)):
+    def train_episodes(self, start_episode, num_episodes, epsilon_decay):
+        """Trains the agent over the given number of episodes, played one after another with the game."""
+        for episode in range(start_episode, start_episode + num_episodes):
+            epsilon = max(EPSILON_MIN, epsilon_decay ** episode)
             secret_word = self.game.generate_secret_word()
-            legal_actions = self.game.get_possible_words()
+            legal_actions = self.game.get_possible_ids()
             done = False
             state = 0 if not self.approximate else ()
 
             while not done:
                 action = self.agent.get_q_action(state, legal_actions, epsilon)
                 pattern, done, _ = self.game.step(action, secret_word)
-                reward = constant_rewards(pattern)
-                legal_actions = self.game.get_possible_words()
+                reward = self.get_reward(pattern, self.game.cur_iter)
+                legal_actions = self.game.get_possible_ids()
                 next_state = 0 if not self.approximate else (action, pattern)
-                self.agent.update(state, action, next_state, reward, alpha, discount, legal_actions)
+                self.agent.update(state, action, next_state, reward, ALPHA, DISCOUNT, legal_actions)
                 state = next_state
-
-            # Decrease epsilon
-            epsilon = max(epsilon_min, epsilon*epsilon_decay)
             self.game.reset()
-        self.agent.save_agent(self.game.get_type())
-        print(f"Training completed over {num_episodes} episodes")
+
+    def train_batched(self, start_episode, num_episodes, epsilon_decay):
+        """
+        Trains the tabular agent over the given number of episodes, played in lockstep in batches of self.batch_size
+        episodes. The possible words of the episodes of a batch are held as one concatenated array of ids, filtered by
+        the pattern codes of their guesses in the game's pattern matrix, so every turn of the batch chooses the actions
+        of all its episodes and updates their Q-values with a few array operations.
+        Every episode explores with the epsilon it would have had in train_episodes. The Q-values of a turn are updated
+        after the actions of all the episodes are chosen, and the random choices are drawn from a generator seeded by
+        the random module.
+        """
+        rng = np.random.default_rng(random.getrandbits(64))
+        pattern_matrix = self.game.get_pattern_matrix()
+        secret_ids = self.game.get_vocabulary().get_ids(self.game.get_secret_words())
+        pattern_rewards = {}  # the rewards of every pattern code, by the turns played
+        self.game.reset()
+        first_action_ids = self.game.get_possible_ids()
+        max_turns = self.game.max_iter if self.game.max_iter is not None else np.inf
+
+        end_episode = start_episode + num_episodes
+        for start in range(start_episode, end_episode, self.batch_size):
+            episodes_num = min(self.batch_size, end_episode - start)
+            epsilons = np.maximum(EPSILON_MIN, epsilon_decay ** np.arange(start, start + episodes_num))
+            secrets = rng.choice(secret_ids, episodes_num)
+            # every episode starts with the legal actions of the reset game, so they are not repeated per episode
+            actions = self.agent.get_shared_q_actions(0, first_action_ids, epsilons, rng)
+            patterns = pattern_matrix.get_pair_codes(actions, secrets)
+            offsets, action_ids = get_answering_ids(pattern_matrix, actions, patterns, first_action_ids)
+            turn = 1
+            while True:
+                # the possible words of every episode after its guess, which always hold its secret word
+                next_values = np.maximum.reduceat(self.agent.get_q_values(0, action_ids), offsets[:-1])
+                if turn not in pattern_rewards:
+                    pattern_rewards[turn] = np.array([self.get_reward(pattern, turn)
+                                                      for pattern in range(PATTERNS_NUM)])
+                self.agent.update_batch(0, actions, pattern_rewards[turn][patterns] + DISCOUNT * next_values, ALPHA)
+                ongoing = (actions != secrets) & (turn < max_turns)
+                if not ongoing.any():
+                    break
+                counts = np.diff(offsets)
+                action_ids = action_ids[np.repeat(ongoing, counts)]
+                offsets = np.concatenate(([0], np.cumsum(counts[ongoing])))
+                secrets, epsilons = secrets[ongoing], epsilons[ongoing]
+                actions = self.agent.get_batch_q_actions(0, offsets, action_ids, epsilons, rng)
+                patterns = pattern_matrix.get_pair_codes(actions, secrets)
+                episodes = np.repeat(np.arange(len(actions)), np.diff(offsets))
+                matches = pattern_matrix.get_pair_codes(actions[episodes], action_ids) == patterns[episodes]
+                offsets = np.concatenate(([0], np.cumsum(np.bincount(episodes[matches], minlength=len(actions)))))
+                action_ids = action_ids[matches]
+                turn += 1
+
+    def get_reward(self, pattern, turn_num):
+        """Returns the reward of the given pattern code in the given turn, by the reward function of the algorithm."""
+        if self.reward == REWARD_TURN:
+            return turn_rewards(pattern, turn_num)
+        return constant_rewards(pattern)
+
+    def get_search_stats(self):
+        """Returns the size and memory of the Q-table (or the weights) of the agent which played last"""
+        if self.playing_agent is None:
+            self.get_playing_agent(self.game)
+        return self.playing_agent.get_table_stats()
 
     def get_action(self, game: AbstractWordle):
         """Returns the next guess given the game being played, according to the agent type (classic vs approximate)"""
-        actions = game.get_possible_words()
+        agent = self.get_playing_agent(game)
+        actions = game.get_possible_ids()
         if not self.approximate:
-            return self.agent.get_policy(0, actions)
+            return agent.get_ranked_policy(0, actions)
         state = ()
         if game.get_game_state():
             guess, pattern = game.get_game_state()[-1]
             state = (guess, pattern)
-        return self.agent.get_policy(state, actions)
+        return agent.get_policy(state, actions)
+
+
+def train_chunk(game: AbstractWordle, approximate, reward, batch_size, model, start_episode, num_episodes,
+                epsilon_decay, seed):
+    """
+    Trains an agent (approximate or not) starting from a copy of the given model over a chunk of episodes of the game,
+    with the random module seeded with the given seed, and returns its training state. The algorithm and its agent are
+    made in the process training the chunk, so only the model is sent to it along with the game (whose words are
+    attached from shared memory). The random state of the process is restored afterwards.
+    """
+    algorithm = Reinforcement(game, approximate=approximate, reward=reward, batch_size=batch_size)
+    algorithm.agent.set_model(np.array(model))
+    random_state = random.getstate()
+    random.seed(seed)
+    algorithm.train_chunk(start_episode, num_episodes, epsilon_decay)
+    random.setstate(random_state)
+    return algorithm.agent.get_training_state()
+
+
+def get_answering_ids(pattern_matrix, guess_ids, patterns, secret_ids):
+    """
+    Returns the ids of the secret words (out of the given ids) answering every guess with its pattern, concatenated -
+    those answering the i-th guess from offsets[i] to offsets[i + 1] - and the offsets. The codes of every distinct
+    guess are read once, and those of a guess repeated by at least MIN_SORTED_GUESSES episodes are sorted once, so
+    each of its episodes takes its secret words as a slice.
+    """
+    unique_guess_ids, guess_indices, guess_counts = np.unique(guess_ids, return_inverse=True, return_counts=True)
+    codes = pattern_matrix.get_codes_block(unique_guess_ids, secret_ids)
+    sorted_secrets = {}
+    for i in np.flatnonzero(guess_counts >= MIN_SORTED_GUESSES).tolist():
+        order = np.argsort(codes[i], kind='stable')
+        sorted_secrets[i] = (secret_ids[order], np.searchsorted(codes[i][order], np.arange(PATTERNS_NUM + 1)))
+    buckets = []
+    for i, pattern in zip(guess_indices.tolist(), patterns.tolist()):
+        if i in sorted_secrets:
+            ids, code_starts = sorted_secrets[i]
+            buckets.append(ids[code_starts[pattern]:code_starts[pattern + 1]])
+        else:
+            buckets.append(secret_ids[codes[i] == pattern])
+    offsets = np.concatenate(([0], np.cumsum([len(bucket) for bucket in buckets])))
+    return offsets, np.concatenate(buckets)
+
+
+def print_table_stats(title, table_stats):
+    """Prints the statistics of the Q-table (or the weights) of an agent under the given title."""
+    print(f"{title}: " + ", ".join(f"{name}: {value}" for name, value in table_stats.items()))
 
 
 def constant_rewards(pattern):
-    """Returns rewards according to the given pattern. green is 10, yellow is 5, and grey is -5."""
+    """Returns rewards according to the given pattern code. green is 10, yellow is 5, and grey is -5."""
     reward = 0
-    for placing in pattern:
+    for placing in PATTERN_PLACINGS[pattern]:
         if placing == Placing.correct.value:
             reward += GREEN_REWARD
         elif placing == Placing.misplaced.value:
@@ -204,10 +583,10 @@ def constant_rewards(pattern):
 
 
 def turn_rewards(pattern, turn_num):
-    """Returns rewards according to the given pattern and the game's turn number. Since the goal is to guess in as
-    fewer guesses as possible, a lower turn results in more rewards."""
+    """Returns rewards according to the given pattern code and the game's turn number. Since the goal is to guess in
+    as fewer guesses as possible, a lower turn results in more rewards."""
     reward = 0
-    for placing in pattern:
+    for placing in PATTERN_PLACINGS[pattern]:
         if placing == Placing.correct.value:
             reward += (7-turn_num)*GREEN_REWARD
         elif placing == Placing.misplaced.value:
@@ -0,0 +1,30 @@
+from Algorithms.algorithm import Algorithm
+from WordleGames.abstract_wordle import AbstractWordle
+from utils.common import AlgorithmType, Word
+from utils.decision_tree import get_decision_tree
+
+
+class TreePolicy(Algorithm):
+    """
+    An algorithm playing by the compiled decision tree of a deterministic algorithm (such as Entropy), so every turn
+    is a lookup. Games whose patterns depend on more than the secret word, and states outside the tree, are played
+    by the algorithm itself.
+    """
+    def __init__(self, algorithm: Algorithm):
+        """Initializes the tree policy of the given deterministic algorithm."""
+        super(TreePolicy, self).__init__(AlgorithmType.TreePolicy)
+        self.algorithm = algorithm
+
+    def get_action(self, game: AbstractWordle) -> Word:
+        """Returns the guess of the algorithm's decision tree at the state of the game."""
+        if not game.fixed_patterns:
+            return self.algorithm.get_action(game)
+        tree = get_decision_tree(self.algorithm, game)
+        node = tree.get_node(game.get_game_state())
+        if node is None:
+            return self.algorithm.get_action(game)
+        return tree.get_guess(node)
+
+    def get_search_stats(self):
+        """Returns the statistics of the search of the algorithm in the states outside the tree."""
+        return self.algorithm.get_search_stats()
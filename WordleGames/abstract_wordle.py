@@ -1,9 +1,16 @@
+import hashlib
 import random
 from abc import ABC, abstractmethod
 from typing import List
 
+import numpy as np
+
 from utils import util
-from utils.common import GameType, WINNING_PATTERN
+from utils.common import GameType, Pattern, PatternRule, WINNING_PATTERN, PATTERNS_NUM
+from utils.letter_index import LetterIndex
+from utils.parallel import attach_shared_words, get_shared_words_descriptor
+from utils.pattern_matrix import PatternMatrix, get_pattern_matrix
+from utils.vocabulary import Vocabulary, get_vocabulary
 
 
 class InvalidGuessException(ValueError):
@@ -12,33 +19,54 @@ class InvalidGuessException(ValueError):
 
 class AbstractWordle(ABC):
     """An abstract class representing each Wordle type game"""
+    pattern_rule = PatternRule.Basic  # the rules used to compute the patterns stored in the pattern matrix
+    fixed_patterns = True  # whether the pattern of a guess depends only on the guess and the secret word
 
-    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], cur_possible_words=[], game_type=None):
+    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], possible_ids=None, game_type=None):
         """
         Initializes an abstract wordle game with the list of secret words without knowing the secret word itself.
         In addition, it is receives the list of legal words for the algorithms to guess, the maximum game iterations,
-        the previous game state, the previous possible words (matching previous patterns), and the game type.
+        the previous game state, the ids of the previous possible words (matching previous patterns) in the
+        vocabulary of the legal words, and the game type.
         """
         super(AbstractWordle, self).__init__()
         self.type: GameType = game_type
         self._secret_words = secret_words
         self.legal_words = legal_words
+        self.vocabulary: Vocabulary = get_vocabulary(legal_words)
         self.max_iter = max_iter
         self.cur_iter = 0
         self.done = False
-        if not cur_possible_words:
-            self.cur_possible_words = legal_words
-        else:
-            self.cur_possible_words = cur_possible_words
+        # the possible words are held as an array of ids, which is never changed in place so successors can share it
+        self.possible_ids = self.vocabulary.all_ids if possible_ids is None else possible_ids
+        self._possible_words = None  # the possible words themselves, built only when asked to
         self.all_patterns = []
         self.states = game_state  # contains pairs of (guess, pattern), namely a word and its resulting pattern.
 
+    def __getstate__(self):
+        """Returns the state of the game to pickle. If the word data of the game was published to shared memory (as it
+        is for the processes of a scoring pool), the word lists are replaced by its descriptor."""
+        state = self.__dict__.copy()
+        descriptor = get_shared_words_descriptor(self.legal_words, self._secret_words, self.pattern_rule)
+        if descriptor is not None:
+            state.update(legal_words=None, _secret_words=None, vocabulary=None, _possible_words=None,
+                         _shared_words=descriptor)
+        return state
+
+    def __setstate__(self, state):
+        """Restores the pickled state of the game, attaching to its word data in shared memory if it was published."""
+        descriptor = state.pop('_shared_words', None)
+        self.__dict__.update(state)
+        if descriptor is not None:
+            self.legal_words, self._secret_words = attach_shared_words(descriptor)
+            self.vocabulary = get_vocabulary(self.legal_words)
+
     def get_type(self):
         """Retunrs the type of the game."""
         return self.type
 
-    def get_all_patterns(self):
-        """Returns all possible game patterns"""
+    def get_all_patterns(self) -> List[Pattern]:
+        """Returns the codes of all possible game patterns"""
         return self.all_patterns
 
     def get_done(self):
@@ -46,7 +74,7 @@ class AbstractWordle(ABC):
         return self.done
 
     def get_game_state(self):
-        """Returns the game state - a list of (guess, pattern) tuples."""
+        """Returns the game state - a list of (guess, pattern code) tuples."""
         return self.states
 
     def get_turn_num(self):
@@ -57,9 +85,48 @@ class AbstractWordle(ABC):
         """Returns the legal words list."""
         return self.legal_words
 
+    def get_secret_words(self):
+        """Returns the secret words list."""
+        return self._secret_words
+
     def get_possible_words(self) -> List[str]:
         """Returns the possible words list (matching the previous guesses and patterns)."""
-        return self.cur_possible_words
+        if self._possible_words is None:
+            self._possible_words = self.vocabulary.get_words(self.possible_ids)
+        return self._possible_words
+
+    def get_possible_ids(self) -> np.ndarray:
+        """Returns the ids of the possible words in the vocabulary of the legal words."""
+        return self.possible_ids
+
+    def set_possible_ids(self, possible_ids: np.ndarray):
+        """Sets the ids of the possible words."""
+        self.possible_ids = possible_ids
+        self._possible_words = None
+
+    def get_possible_hash(self) -> bytes:
+        """Returns a hash identifying the legal words and the possible words of the game, which are all the state the
+        searches of the adversarial agents depend on, since the games they search never end."""
+        possible_hash = hashlib.blake2b(self.vocabulary.get_hash().encode(), digest_size=16)
+        possible_hash.update(self.possible_ids.tobytes())
+        return possible_hash.digest()
+
+    def get_vocabulary(self) -> Vocabulary:
+        """Returns the vocabulary of the legal words."""
+        return self.vocabulary
+
+    def get_letter_index(self) -> LetterIndex:
+        """Returns the index of the letter constraint bitmasks of the legal words."""
+        return self.vocabulary.get_letter_index()
+
+    def get_pattern_matrix(self) -> PatternMatrix:
+        """Returns the matrix of the patterns of every legal word according to every legal word."""
+        return get_pattern_matrix(self.legal_words, self.legal_words, self.pattern_rule)
+
+    def get_secret_pattern_matrix(self) -> PatternMatrix:
+        """Returns the matrix of the patterns of every legal word according to every secret word, whose columns are
+        the ids of the secret words in the vocabulary of the secret words (their indices in the secret words list)."""
+        return get_pattern_matrix(self.legal_words, self._secret_words, self.pattern_rule)
 
     def generate_secret_word(self):
         """Generates a random secret word."""
@@ -68,19 +135,19 @@ class AbstractWordle(ABC):
     def step(self, guess: str, secret_word: str):
         """
         Performs a single step in the game following a guess. It updates the game state and the list of possible words.
-        :return: the resulting pattern of the guess, a boolean flag - whether the game is done, a boolean flag -
+        :return: the resulting pattern code of the guess, a boolean flag - whether the game is done, a boolean flag -
         did the player win.
         """
         guess = guess.lower()
-        if guess not in self.legal_words:
+        if guess not in self.vocabulary:
             raise InvalidGuessException('invalid word')
 
         self.cur_iter += 1
 
         pattern = self.get_pattern(guess, secret_word)
         self.states.append((guess, pattern))
-        self.cur_possible_words = self.filter_words()
-        is_win = (guess == secret_word) if self.type != GameType.Absurdle else (tuple(pattern) == WINNING_PATTERN)
+        self.set_possible_ids(self.filter_words())
+        is_win = (guess == secret_word) if self.type != GameType.Absurdle else (pattern == WINNING_PATTERN)
         is_max_iter = (self.max_iter is not None and self.cur_iter >= self.max_iter)
         if is_win or is_max_iter:
             self.done = True
@@ -91,37 +158,40 @@ class AbstractWordle(ABC):
         """Resets the game."""
         self.cur_iter = 0
         self.done = False
-        self.cur_possible_words = self.legal_words
+        self.set_possible_ids(self.vocabulary.all_ids)
         self.states.clear()
 
     def apply_action(self, action: str):
         """Applies agent action. The action is a word and it is added to the game state without a pattern."""
-        self.states.append((action, []))
+        self.states.append((action, None))
 
-    def apply_opponent_action(self, action):
-        """Applies the opponent action. The action is a pattern, so it updates the guess of the agent to have
-         the pattern. In addition, it updates the possible words list for the next agent action."""
+    def apply_opponent_action(self, action: Pattern, possible_ids=None):
+        """Applies the opponent action. The action is a pattern code, so it updates the guess of the agent to have
+         the pattern. In addition, it updates the possible words list for the next agent action, unless the ids of
+         the possible words answering the guess with the pattern are given (as split by the pattern matrix)."""
         guess, _ = self.states[-1]
-        pattern = list(action)
-        self.states[-1] = (guess, pattern)
-        self.cur_possible_words = self.filter_words()
+        self.states[-1] = (guess, action)
+        self.set_possible_ids(self.filter_words() if possible_ids is None else possible_ids)
 
     def get_possible_patterns(self, guess):
         """This method returns all possible patterns for the opponent by generating patterns for all possible words.
-        It enters them to a util.Counter so they can be used to calculate the expected score in Expectimax."""
+        It enters their codes to a util.Counter so they can be used to calculate the expected score in Expectimax."""
         patterns_counter = util.Counter()
-        for secret_word in self.cur_possible_words:
-            patterns_counter[tuple(self.get_pattern(guess, secret_word))] += 1
+        codes_count = np.bincount(self.get_pattern_matrix().get_codes(guess, self.possible_ids),
+                                  minlength=PATTERNS_NUM)
+        for code in np.flatnonzero(codes_count).tolist():
+            patterns_counter[code] = int(codes_count[code])
         return patterns_counter
 
     @abstractmethod
-    def filter_words(self):
-        """Filters words from the possible words list according to the last guess and pattern."""
+    def filter_words(self) -> np.ndarray:
+        """Filters words from the possible words according to the last guess and pattern, and returns the ids of the
+        remaining words."""
         pass
 
     @abstractmethod
-    def get_pattern(self, guess: str, secret_word: str):
-        """Returns a list containing the placing of each letter in the guess according to the secret word."""
+    def get_pattern(self, guess: str, secret_word: str) -> Pattern:
+        """Returns the pattern code of the placing of each letter in the guess according to the secret word."""
         pass
 
     @abstractmethod
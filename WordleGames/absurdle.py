@@ -1,50 +1,71 @@
-from typing import List
+import hashlib
 
+import numpy as np
+
+from utils import util
 from WordleGames import BasicWordle
-from utils.common import Word, WINNING_PATTERN, GameType, MAX
+from utils.common import Pattern, WINNING_PATTERN, GameType, MAX, PATTERNS_NUM, PATTERN_PLACINGS
 
 
 class Absurdle(BasicWordle):
     """Absurdle game class extending the BasicWordle game."""
-    def __init__(self, secret_words, legal_words, max_iter=None, game_state=[], cur_possible_words=[]):
+    fixed_patterns = False
+
+    def __init__(self, secret_words, legal_words, max_iter=None, game_state=[], possible_ids=None,
+                 possible_secret_ids=None):
         super(Absurdle, self).__init__(secret_words, legal_words, max_iter,
-                                       game_state, cur_possible_words, GameType.Absurdle)
-        self._possible_secret_words = secret_words
+                                       game_state, possible_ids, GameType.Absurdle)
+        # the ids of the secret words matching the previous patterns, in the vocabulary of the legal words
+        if possible_secret_ids is None:
+            possible_secret_ids = self.vocabulary.get_ids(secret_words)
+        self._possible_secret_ids = possible_secret_ids
 
     def successor_creator(self, successor=None, agent_index=MAX, action=None):
         """Creates a successor game object for the adversarial algorithms."""
-        return Absurdle(self._possible_secret_words.copy(), self.legal_words, self.max_iter,
-                        self.states.copy(), self.cur_possible_words.copy())
+        return Absurdle(self._secret_words, self.legal_words, self.max_iter,
+                        self.states.copy(), self.possible_ids, self._possible_secret_ids)
 
-    def filter_words(self) -> List[Word]:
+    def filter_words(self) -> np.ndarray:
         """
-        Filters words from the possible words list according to the last guess and pattern.
-        In Absurdle, the filtering is like basic Wordle, however the internal list of secret words is updates as well.
+        Filters words from the possible words according to the last guess and pattern.
+        In Absurdle, the filtering is like basic Wordle, however the internal secret words are updated as well.
         """
-        filtered_words = super(Absurdle, self).filter_words()
-        self._possible_secret_words = [word for word in self._possible_secret_words if word in filtered_words]
-        return filtered_words
-
-    def get_pattern(self, guess: str, secret_word: str):
-        """Returns a list containing the placing of each letter in the guess."""
-        pattern_words_count = {tuple(pattern): 0 for pattern in self.all_patterns}
-        for word in self._possible_secret_words:
-            word_pattern = tuple(super(Absurdle, self).get_pattern(guess, word))
-            pattern_words_count[word_pattern] += 1
-        if len(self._possible_secret_words) == 1 and pattern_words_count[WINNING_PATTERN] == 1:
+        filtered_ids = super(Absurdle, self).filter_words()
+        self._possible_secret_ids = self._possible_secret_ids[np.isin(self._possible_secret_ids, filtered_ids)]
+        return filtered_ids
+
+    def get_pattern(self, guess: str, secret_word: str) -> Pattern:
+        """Returns the pattern code of the placing of each letter in the guess."""
+        pattern_words_count = np.bincount(self.get_pattern_matrix().get_codes(guess, self._possible_secret_ids),
+                                          minlength=PATTERNS_NUM)
+        if len(self._possible_secret_ids) == 1 and pattern_words_count[WINNING_PATTERN] == 1:
             best_pattern = WINNING_PATTERN
         else:
-            max_count = max(pattern_words_count.values())
-            best_patterns = [k for k, v in pattern_words_count.items() if v == max_count and k != WINNING_PATTERN]
+            max_count = pattern_words_count[1:].max()  # the winning pattern has the code 0
+            best_patterns = (np.flatnonzero(pattern_words_count[1:] == max_count) + 1).tolist()
             max_pattern_sum = 0
             best_pattern = best_patterns[-1]
             for pattern in best_patterns:
-                if sum(pattern) > max_pattern_sum:
-                    max_pattern_sum = sum(pattern)
+                if sum(PATTERN_PLACINGS[pattern]) > max_pattern_sum:
+                    max_pattern_sum = sum(PATTERN_PLACINGS[pattern])
                     best_pattern = pattern
-        return list(best_pattern)
+        return best_pattern
+
+    def get_possible_hash(self) -> bytes:
+        """Returns a hash identifying the legal words, the possible words and the possible secret words of the game."""
+        possible_hash = hashlib.blake2b(super(Absurdle, self).get_possible_hash(), digest_size=16)
+        possible_hash.update(self._possible_secret_ids.tobytes())
+        return possible_hash.digest()
+
+    def get_possible_patterns(self, guess):
+        """Returns the only pattern Absurdle answers with, which does not depend on the secret word, counted once
+        for every possible word."""
+        patterns_counter = util.Counter()
+        if len(self.possible_ids):
+            patterns_counter[self.get_pattern(guess, None)] = len(self.possible_ids)
+        return patterns_counter
 
     def reset(self):
-        """Resets the Absurdle game. Adding reset for the internal list of secret words."""
+        """Resets the Absurdle game. Adding reset for the internal secret words."""
         super(Absurdle, self).reset()
-        self._possible_secret_words = self._secret_words
+        self._possible_secret_ids = self.vocabulary.get_ids(self._secret_words)
@@ -1,23 +1,22 @@
-from typing import List
-import itertools
+import numpy as np
+
 from utils import util
 
 from WordleGames.abstract_wordle import AbstractWordle
-from utils.common import Placing, Word, GameType, MAX, LETTERS_NUM
+from utils.common import Placing, Pattern, Word, GameType, MAX, PATTERNS_NUM, PATTERN_PLACINGS
 
 
 class BasicWordle(AbstractWordle):
     """Classic Wordle game extending the AbstractWordle class."""
-    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], cur_possible_words=[],
+    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], possible_ids=None,
                  game_type=GameType.BasicWordle):
         """Initializing the classic Wordle game."""
         super(BasicWordle, self).__init__(secret_words, legal_words, max_iter, game_state,
-                                          cur_possible_words, game_type)
-        self.all_patterns = [list(pattern) for pattern in
-                             itertools.product([placing.value for placing in Placing], repeat=LETTERS_NUM)]
+                                          possible_ids, game_type)
+        self.all_patterns = list(range(PATTERNS_NUM))
 
-    def get_pattern(self, guess: Word, secret_word: Word):
-        """Returns a list containing the placing of each letter in the guess according to the secret word."""
+    def get_pattern(self, guess: Word, secret_word: Word) -> Pattern:
+        """Returns the pattern code of the placing of each letter in the guess according to the secret word."""
         pool = {}
         for g, s in zip(guess, secret_word):
             if g == s:
@@ -27,23 +26,24 @@ class BasicWordle(AbstractWordle):
             else:
                 pool[s] = 1
 
-        pattern = []
+        pattern = 0
         for guess_letter, solution_letter in zip(guess, secret_word):
+            pattern *= 3
             if guess_letter == solution_letter:
-                pattern.append(int(Placing.correct))
+                pattern += int(Placing.correct)
             elif guess_letter in secret_word and guess_letter in pool and pool[guess_letter] > 0:
-                pattern.append(int(Placing.misplaced))
+                pattern += int(Placing.misplaced)
                 pool[guess_letter] -= 1
             else:
-                pattern.append(int(Placing.incorrect))
+                pattern += int(Placing.incorrect)
         return pattern
 
     def successor_creator(self, successor=None, agent_index=MAX, action=None):
         """Creates a successor game object for the adversarial algorithms."""
         return BasicWordle(self._secret_words, self.legal_words, self.max_iter,
-                           self.states.copy(), self.cur_possible_words.copy())
+                           self.states.copy(), self.possible_ids)
 
-    def filter_words(self) -> List[Word]:
+    def filter_words(self) -> np.ndarray:
         """
         This method updates and returns the current words one can guess in a basic wordle game.
         There are 5 filters a word must pass to be considered possible:
@@ -56,12 +56,18 @@ class BasicWordle(AbstractWordle):
         5. It must also NOT contain less letters than the known amount (if a letter is both green and yellow in
            different places it must appear at least twice).
         :param game_visible_state: the current state of the game containing a list of pairs of (guess, patterns)
-        :return: the current list of legal words to guess: self.cur_legal_words
+        :return: the ids of the current words one can guess
         """
         states = self.states
         if not states:  # if no guess was made we return the list as is, since every word is possible.
-            return self.cur_possible_words
+            return self.possible_ids
         guess, pattern = states[-1]
+        return self.get_letter_index().filter_ids(self.possible_ids, self.get_pattern_mask(guess, pattern))
+
+    def get_pattern_mask(self, guess: Word, pattern_code: Pattern):
+        """Returns the packed mask (see LetterIndex) of the legal words passing the filters of filter_words according
+        to the given guess and pattern code. Every filter is a few bitwise operations over the masks of the index."""
+        pattern = PATTERN_PLACINGS[pattern_code]
 
         correct_letters, removed_letters, misplaced_letters = [], [], []  # lists to hold letters placing with indices.
         correct, removed, misplaced = [], [], []  # lists to hold only letters placing.
@@ -93,29 +99,26 @@ class BasicWordle(AbstractWordle):
             if pop_flag:
                 removed = list(filter((letter).__ne__, removed))  # we remove a special letter from the removed list
 
-        def should_keep_word(word):
-            # 1. remove words with incorrect letters
-            if any(letter in word for letter in removed):
-                return False
-
-            # 2. remove words if they have misplaced letters in the wrong spot or misplaced letters are not in the word
-            if any((word[idx] == letter or letter not in word) for idx, letter in misplaced_letters):
-                return False
+        index = self.get_letter_index()
+        mask = index.all_words_mask
+        # 1. remove words with incorrect letters
+        for letter in removed:
+            mask = mask & ~index.contains_mask(letter)
 
-            # 3. remove words that don't match correct letters
-            if any((word[idx] != letter) for idx, letter in correct_letters):
-                return False
+        # 2. remove words if they have misplaced letters in the wrong spot or misplaced letters are not in the word
+        for idx, letter in misplaced_letters:
+            mask = mask & ~index.position_mask(idx, letter) & index.contains_mask(letter)
 
-            # 4. remove words that contain more letters than the known amount
-            for letter in special_letters:
-                if word.count(letter) > special_letters[letter]:
-                    return False
+        # 3. remove words that don't match correct letters
+        for idx, letter in correct_letters:
+            mask = mask & index.position_mask(idx, letter)
 
-            # 5. remove words that contain less letters than the known amount
-            for letter in minimum_letters:
-                if word.count(letter) < minimum_letters[letter]:
-                    return False
+        # 4. remove words that contain more letters than the known amount
+        for letter in special_letters:
+            mask = mask & index.at_most_mask(letter, special_letters[letter])
 
-            return True
+        # 5. remove words that contain less letters than the known amount
+        for letter in minimum_letters:
+            mask = mask & index.at_least_mask(letter, minimum_letters[letter])
 
-        return list(filter(should_keep_word, self.cur_possible_words))
+        return mask
@@ -1,14 +1,19 @@
 import random
+
+import numpy as np
+
 from WordleGames import BasicWordle
-from utils.common import Placing, GameType, LETTERS_NUM, MAX, Word, LOSING_PATTERN
+from utils.common import Placing, Pattern, GameType, LETTERS_NUM, MAX, Word, LOSING_PATTERN, PATTERN_PLACINGS
 from utils import util
 
 
 class NoisyWordle(BasicWordle):
     """Noisy Wordle game"""
-    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], cur_possible_words=[]):
+    fixed_patterns = False
+
+    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], possible_ids=None):
         super(NoisyWordle, self).__init__(secret_words, legal_words, max_iter,
-                                          game_state, cur_possible_words, GameType.NoisyWordle)
+                                          game_state, possible_ids, GameType.NoisyWordle)
 
     @staticmethod
     def weight_placing(real_placing):
@@ -19,14 +24,15 @@ class NoisyWordle(BasicWordle):
     def successor_creator(self, successor=None, agent_index=MAX, action=None):
         """Creates a successor game object for the adversarial algorithms."""
         return NoisyWordle(self._secret_words, self.legal_words, self.max_iter,
-                           self.states.copy(), self.cur_possible_words.copy())
+                           self.states.copy(), self.possible_ids)
 
-    def get_pattern(self, guess: str, secret_word: Word):
-        """Returns a legal pattern for a Noisy Wordle game according to the secret word"""
+    def get_pattern(self, guess: str, secret_word: Word) -> Pattern:
+        """Returns a legal pattern code for a Noisy Wordle game according to the secret word"""
         pattern = super(NoisyWordle, self).get_pattern(guess, secret_word)
         chosen_square = random.randrange(LETTERS_NUM)
-        pattern[chosen_square] = random.choice(NoisyWordle.weight_placing(pattern[chosen_square]))
-        return pattern
+        real_placing = PATTERN_PLACINGS[pattern][chosen_square]
+        noisy_placing = random.choice(NoisyWordle.weight_placing(real_placing))
+        return pattern + (noisy_placing - real_placing) * 3 ** (LETTERS_NUM - 1 - chosen_square)
 
     def get_possible_patterns(self, guess):
         """Returns the losing pattern"""
@@ -34,42 +40,34 @@ class NoisyWordle(BasicWordle):
         patterns_counter[LOSING_PATTERN] = 1
         return patterns_counter
 
-    def filter_words(self):
+    def filter_words(self) -> np.ndarray:
         """
         Filters words from the possible words list according to the last guess and pattern.
-        In Noisy Wordle, the filtering is like basic Wordle, however the patterns are 11 different possible patterns
+        In Noisy Wordle, the filtering is like basic Wordle, however the patterns are 11 different possible patterns,
+        so the words passing the filters of any of them are unified.
         """
         if not self.get_game_state():
-            return self.cur_possible_words
+            return self.possible_ids
         guess, original_pattern = self.get_game_state()[-1]
-        all_patterns = noisy_patterns(original_pattern)
-        unified_words = set()
-        for pattern in all_patterns:
-            self.states[-1] = (guess, pattern)
-            unified_words = unified_words.union(set(super(NoisyWordle, self).filter_words()))
-        self.states[-1] = (guess, original_pattern)
-        return list(unified_words)
+        index = self.get_letter_index()
+        unified_mask = np.zeros_like(index.all_words_mask)
+        for pattern in noisy_patterns(original_pattern):
+            unified_mask |= self.get_pattern_mask(guess, pattern)
+        return index.filter_ids(self.possible_ids, unified_mask)
 
 
 def noisy_patterns(pattern):
-    """Returns 11 possible noisy patterns"""
+    """Returns the codes of the 11 possible noisy patterns"""
     all_patterns = [pattern]
-    for i, placing in enumerate(pattern):
-        possible_pattern1 = pattern.copy()
-        possible_pattern2 = pattern.copy()
+    for i, placing in enumerate(PATTERN_PLACINGS[pattern]):
+        digit = 3 ** (LETTERS_NUM - 1 - i)
         if placing == Placing.correct.value:
-            possible_pattern1[i] = Placing.misplaced.value
-            all_patterns.append(possible_pattern1)
-            possible_pattern2[i] = Placing.incorrect.value
-            all_patterns.append(possible_pattern2)
+            all_patterns.append(pattern + (Placing.misplaced.value - placing) * digit)
+            all_patterns.append(pattern + (Placing.incorrect.value - placing) * digit)
         elif placing == Placing.misplaced.value:
-            possible_pattern1[i] = Placing.correct.value
-            all_patterns.append(possible_pattern1)
-            possible_pattern2[i] = Placing.incorrect.value
-            all_patterns.append(possible_pattern2)
+            all_patterns.append(pattern + (Placing.correct.value - placing) * digit)
+            all_patterns.append(pattern + (Placing.incorrect.value - placing) * digit)
         else:
-            possible_pattern1[i] = Placing.correct.value
-            all_patterns.append(possible_pattern1)
-            possible_pattern2[i] = Placing.misplaced.value
-            all_patterns.append(possible_pattern2)
+            all_patterns.append(pattern + (Placing.correct.value - placing) * digit)
+            all_patterns.append(pattern + (Placing.misplaced.value - placing) * digit)
     return all_patterns
@@ -1,37 +1,33 @@
 import itertools
-from typing import List
+
+import numpy as np
 
 from utils import util
 from WordleGames.abstract_wordle import AbstractWordle
-from utils.common import Placing, GameType, LETTERS_NUM, MAX
+from utils.common import Placing, Pattern, GameType, PatternRule, LETTERS_NUM, MAX, PATTERN_PLACINGS, \
+    get_pattern_yellow, pattern_to_code
 
 
 class YellowWordle(AbstractWordle):
     """Yellow Wordle game"""
-    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], cur_possible_words=[]):
+    pattern_rule = PatternRule.Yellow
+
+    def __init__(self, secret_words, legal_words, max_iter=6, game_state=[], possible_ids=None):
         super(YellowWordle, self).__init__(secret_words, legal_words, max_iter, game_state,
-            cur_possible_words, GameType.YellowWordle)
-        self.all_patterns = [list(pattern) for pattern in
+            possible_ids, GameType.YellowWordle)
+        self.all_patterns = [pattern_to_code(pattern) for pattern in
                              itertools.product([Placing.misplaced.value, Placing.incorrect.value], repeat=LETTERS_NUM)]
 
-    def get_pattern(self, guess: str, secret_word: str):
-        """Returns a legal pattern for a Yellow Wordle game according to the secret word"""
-        target_word = list(secret_word)
-        pattern = [Placing.incorrect for _ in range(LETTERS_NUM)]
-
-        for i in range(LETTERS_NUM):
-            if guess[i] in target_word:
-                target_word.remove(guess[i])
-                pattern[i] = Placing.misplaced
-
-        return [int(elem) for elem in pattern]
+    def get_pattern(self, guess: str, secret_word: str) -> Pattern:
+        """Returns a legal pattern code for a Yellow Wordle game according to the secret word"""
+        return get_pattern_yellow(guess, secret_word)
 
     def successor_creator(self, agent_index=MAX, action=None):
         """Creates a successor game object for the adversarial algorithms."""
         return YellowWordle(self._secret_words, self.legal_words, self.max_iter, self.states.copy(),
-                            self.cur_possible_words.copy())
+                            self.possible_ids)
 
-    def filter_words(self) -> List[str]:
+    def filter_words(self) -> np.ndarray:
         """
         This method updates and returns the current words one can guess in a basic wordle game.
         There are 4 filters a word must pass to be considered possible:
@@ -43,12 +39,18 @@ class YellowWordle(AbstractWordle):
         4. It must also NOT contain less letters than the known amount (if a letter is both green and yellow in
            different places it must appear at least twice).
         :param game_visible_state: the current state of the game containing a list of pairs of (guess, patterns)
-        :return: the current list of legal words to guess: self.cur_legal_words
+        :return: the ids of the current words one can guess
         """
         states = self.get_game_state()
         if not states:  # if no guess was made we return the list as is, since every word is possible.
-            return self.cur_possible_words
+            return self.possible_ids
         guess, pattern = states[-1]
+        return self.get_letter_index().filter_ids(self.possible_ids, self.get_pattern_mask(guess, pattern))
+
+    def get_pattern_mask(self, guess: str, pattern_code: Pattern):
+        """Returns the packed mask (see LetterIndex) of the legal words passing the filters of filter_words according
+        to the given guess and pattern code. Every filter is a few bitwise operations over the masks of the index."""
+        pattern = PATTERN_PLACINGS[pattern_code]
 
         removed_letters, misplaced_letters = [], []  # lists to hold letters placing with indices.
         removed, misplaced = [], []  # lists to hold only letters placing.
@@ -72,25 +74,22 @@ class YellowWordle(AbstractWordle):
             if pop_flag:
                 removed = list(filter((letter).__ne__, removed))  # we remove a special letter from the removed list
 
-        def should_keep_word(word):
-            # 1. remove words with incorrect letters
-            if any(letter in word for letter in removed):
-                return False
-
-            # 2. remove words if they have misplaced letters in the wrong spot or misplaced letters are not in the word
-            if any((letter not in word) for idx, letter in misplaced_letters):
-                return False
+        index = self.get_letter_index()
+        mask = index.all_words_mask
+        # 1. remove words with incorrect letters
+        for letter in removed:
+            mask = mask & ~index.contains_mask(letter)
 
-            # 3. remove words that contain more letters than the known amount
-            for letter in special_letters:
-                if word.count(letter) > special_letters[letter]:
-                    return False
+        # 2. remove words if misplaced letters are not in the word
+        for idx, letter in misplaced_letters:
+            mask = mask & index.contains_mask(letter)
 
-            # 4. remove words that contain less letters than the known amount
-            for letter in minimum_letters:
-                if word.count(letter) < minimum_letters[letter]:
-                    return False
+        # 3. remove words that contain more letters than the known amount
+        for letter in special_letters:
+            mask = mask & index.at_most_mask(letter, special_letters[letter])
 
-            return True
+        # 4. remove words that contain less letters than the known amount
+        for letter in minimum_letters:
+            mask = mask & index.at_least_mask(letter, minimum_letters[letter])
 
-        return list(filter(should_keep_word, self.cur_possible_words))
+        return mask
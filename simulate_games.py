@@ -23,6 +23,12 @@ def parse_args():
     parser.add_argument('-a', '--algorithm', type=str,
                         choices=[algorithm_type.value for algorithm_type in AlgorithmType],
                         default=AlgorithmType.Random.value, help='which algorithm to use')
+    parser.add_argument('--normal-mode', action='store_true',
+                        help='let the Entropy algorithm guess any legal word and not only possible words')
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help='# of processes scoring the candidates of the Entropy and adversarial algorithms')
+    parser.add_argument('-t', '--time-limit', type=float, default=None,
+                        help='seconds the AlphaBeta (anytime) and Entropy lookahead algorithms search every move for')
     parser.add_argument('--seed', type=int, default=42, help='random seed. -1 for system time.')
     return parser.parse_args()
 
@@ -42,7 +48,8 @@ def simulate_games():
     game = get_game(secret_words, legal_words, args.game)
 
     # select algorithm
-    algorithm = get_algorithm(args.algorithm, game)
+    algorithm = get_algorithm(args.algorithm, game, hard_mode=not args.normal_mode,
+                              processes=args.processes, time_limit=args.time_limit)
 
     # Simulate games
     simulator = Simulator(game, algorithm)
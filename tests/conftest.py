@@ -0,0 +1,40 @@
+import os
+import random
+
+import pytest
+
+from utils.common import DATA_DIR
+
+# the module attributes of the directories of the caches computed while playing
+CACHE_DIRS = ["utils.pattern_matrix.PATTERN_MATRIX_DIR", "utils.opening_book.OPENING_BOOK_DIR",
+              "utils.decision_tree.DECISION_TREE_DIR", "Algorithms.entropy.PRIORS_DIR"]
+
+
+def read_words(file_name):
+    with open(os.path.join(DATA_DIR, file_name)) as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dirs(tmp_path_factory):
+    """Stores the caches computed by the tests in a temporary directory, so they never change the data directory."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for cache_dir in CACHE_DIRS:
+            monkeypatch.setattr(cache_dir, str(tmp_path_factory.mktemp(cache_dir.rsplit(".", 1)[1].lower())))
+        yield
+
+
+@pytest.fixture(scope="session")
+def word_lists():
+    """The secret and legal words of Wordle."""
+    return read_words("secret_words.txt"), read_words("legal_words.txt")
+
+
+@pytest.fixture(scope="session")
+def small_word_lists(word_lists):
+    """Secret and legal words sampled from the words of Wordle, few enough to compute their pattern matrices fast."""
+    secret_words, legal_words = word_lists
+    rng = random.Random(0)
+    small_secret_words = rng.sample(secret_words, 100)
+    other_words = sorted(set(legal_words) - set(small_secret_words))
+    return small_secret_words, small_secret_words + rng.sample(other_words, 200)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from Algorithms.entropy import SCORE_TOLERANCE, Entropy, EntropyLookahead, get_entropy_bounds
+from WordleGames import BasicWordle, YellowWordle
+from utils.decision_tree import get_decision_tree
+
+
+def test_lookahead_deadline_not_cached(small_word_lists, monkeypatch):
+    # a lookahead cut by its deadline depends on the machine, so its guesses are never cached
+    algorithm = EntropyLookahead(time_limit=10)
+    assert algorithm.get_policy_name() is None
+    monkeypatch.setattr("Algorithms.entropy.get_opening_book", None)
+    game = BasicWordle(*small_word_lists, game_state=[])
+    assert algorithm.get_action(game) in game.get_vocabulary()
+    with pytest.raises(ValueError):
+        get_decision_tree(algorithm, game)
+    assert EntropyLookahead(top_k=5, max_pairs=100).get_policy_name() == "entropy_lookahead_hard_top5_pairs100"
+
+
+@pytest.mark.parametrize("game_class", [BasicWordle, YellowWordle])
+@pytest.mark.parametrize("hard_mode", [True, False])
+def test_bounded_guesses(small_word_lists, monkeypatch, game_class, hard_mode):
+    # pruning the guesses whose entropy bounds cannot beat the best entropy chooses the guess of the full scan
+    monkeypatch.setattr("Algorithms.entropy.MAX_BATCH_PAIRS", 0)
+    monkeypatch.setattr("Algorithms.entropy.BOUNDED_BATCH_SIZE", 8)
+    secret_words, legal_words = small_word_lists
+    algorithm = Entropy(hard_mode)
+    for first_guess in [None, "eclat", "spawl", "shrug"]:
+        game = game_class(secret_words, legal_words, game_state=[])
+        if first_guess is not None:
+            game.step(first_guess, secret_words[1])
+        guess_ids = algorithm.get_guess_ids(game)
+        expected_infos = algorithm.get_expected_infos(guess_ids, game)
+        bounds = get_entropy_bounds(game.get_letter_index(), guess_ids, game.get_possible_ids())
+        assert np.all(bounds >= expected_infos - SCORE_TOLERANCE)
+        assert algorithm.choose_action(game) == algorithm.choose_guess(guess_ids, expected_infos, game)
+    assert algorithm.pruned_num > 0
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from WordleGames import BasicWordle, NoisyWordle, YellowWordle, Absurdle
+from WordleGames.noisy_wordle import noisy_patterns
+from utils import util
+from utils.common import Placing, PATTERN_PLACINGS
+
+GAMES_NUM = 10
+MAX_TURNS = 6  # Absurdle has no limit on its turns
+
+
+def filter_basic_words(words, guess, pattern):
+    """The filter of the words of basic Wordle before the letter index, running a closure over every word, according to
+    the guess and the code of its pattern."""
+    correct_letters, removed_letters, misplaced_letters = [], [], []
+    correct, removed, misplaced = [], [], []
+    minimum_letters = util.Counter()
+    for idx, (letter, match) in enumerate(zip(guess, PATTERN_PLACINGS[pattern])):
+        if match == int(Placing.incorrect):
+            removed_letters.append((idx, letter))
+            removed.append(letter)
+        elif match == int(Placing.correct):
+            correct_letters.append((idx, letter))
+            correct.append(letter)
+            minimum_letters[letter] += 1
+        else:
+            misplaced_letters.append((idx, letter))
+            misplaced.append(letter)
+            minimum_letters[letter] += 1
+
+    special_letters = util.Counter()
+    for idx, letter in removed_letters:
+        pop_flag = False
+        if letter in correct:
+            special_letters[letter] += correct.count(letter)
+            misplaced_letters.append((idx, letter))
+            pop_flag = True
+        if letter in misplaced:
+            special_letters[letter] += misplaced.count(letter)
+            misplaced_letters.append((idx, letter))
+            pop_flag = True
+        if pop_flag:
+            removed = list(filter(letter.__ne__, removed))
+
+    def should_keep_word(word):
+        if any(letter in word for letter in removed):
+            return False
+        if any((word[idx] == letter or letter not in word) for idx, letter in misplaced_letters):
+            return False
+        if any((word[idx] != letter) for idx, letter in correct_letters):
+            return False
+        for letter in special_letters:
+            if word.count(letter) > special_letters[letter]:
+                return False
+        for letter in minimum_letters:
+            if word.count(letter) < minimum_letters[letter]:
+                return False
+        return True
+
+    return list(filter(should_keep_word, words))
+
+
+def filter_yellow_words(words, guess, pattern):
+    """The filter of the words of Yellow Wordle before the letter index, running a closure over every word."""
+    removed_letters, misplaced_letters = [], []
+    removed, misplaced = [], []
+    minimum_letters = util.Counter()
+    for idx, (letter, match) in enumerate(zip(guess, PATTERN_PLACINGS[pattern])):
+        if match == int(Placing.incorrect):
+            removed_letters.append((idx, letter))
+            removed.append(letter)
+        else:
+            misplaced_letters.append((idx, letter))
+            misplaced.append(letter)
+            minimum_letters[letter] += 1
+
+    special_letters = util.Counter()
+    for idx, letter in removed_letters:
+        if letter in misplaced:
+            special_letters[letter] += misplaced.count(letter)
+            misplaced_letters.append((idx, letter))
+            removed = list(filter(letter.__ne__, removed))
+
+    def should_keep_word(word):
+        if any(letter in word for letter in removed):
+            return False
+        if any((letter not in word) for idx, letter in misplaced_letters):
+            return False
+        for letter in special_letters:
+            if word.count(letter) > special_letters[letter]:
+                return False
+        for letter in minimum_letters:
+            if word.count(letter) < minimum_letters[letter]:
+                return False
+        return True
+
+    return list(filter(should_keep_word, words))
+
+
+def filter_noisy_words(words, guess, pattern):
+    """The filter of the words of Noisy Wordle before the letter index, unifying the basic filters of every noisy
+    pattern."""
+    unified_words = set()
+    for noisy_pattern in noisy_patterns(pattern):
+        unified_words.update(filter_basic_words(words, guess, noisy_pattern))
+    return [word for word in words if word in unified_words]
+
+
+def play_filtered_games(game, filter_words, seed):
+    """Plays seeded games of random guesses, and checks the words left possible after every guess are the words the
+    closure filter keeps."""
+    rng = random.Random(seed)
+    random.seed(seed)  # the noise of Noisy Wordle
+    for _ in range(GAMES_NUM):
+        game.reset()
+        secret_word = rng.choice(game._secret_words)
+        done = False
+        while not done and game.get_turn_num() <= MAX_TURNS:
+            possible_words = game.get_possible_words()
+            guess = rng.choice(game.legal_words)
+            pattern, done, _ = game.step(guess, secret_word)
+            assert game.get_possible_words() == filter_words(possible_words, guess, pattern)
+
+
+@pytest.mark.parametrize("game_class, filter_words", [(BasicWordle, filter_basic_words),
+                                                      (YellowWordle, filter_yellow_words),
+                                                      (NoisyWordle, filter_noisy_words)])
+def test_filter_words(word_lists, game_class, filter_words):
+    play_filtered_games(game_class(*word_lists, game_state=[]), filter_words, 0)
+
+
+def test_filter_absurdle_words(small_word_lists):
+    # Absurdle filters the words as basic Wordle, with the patterns it chooses
+    play_filtered_games(Absurdle(*small_word_lists, game_state=[]), filter_basic_words, 1)
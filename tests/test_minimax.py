@@ -0,0 +1,121 @@
+import random
+
+import numpy as np
+import pytest
+
+from Algorithms.minimax import AlphaBeta, Expectimax, Minimax, SparseExpectimax, generate_successor, \
+    get_pattern_buckets
+from WordleGames import BasicWordle
+from utils.common import MAX, MIN
+from utils.decision_tree import get_decision_tree
+from utils.transposition_table import TranspositionTable
+
+
+def get_game(small_word_lists, first_guess=None, game_class=BasicWordle):
+    """Returns a game of the small vocabulary, after the first guess (with the second secret word) if it is given."""
+    secret_words, legal_words = small_word_lists
+    game = game_class(secret_words, legal_words, game_state=[])
+    if first_guess is not None:
+        game.step(first_guess, secret_words[1])
+    return game
+
+
+def test_anytime_not_cached(small_word_lists, monkeypatch):
+    # the moves of the anytime search depend on the machine, so they are never cached
+    algorithm = AlphaBeta(time_limit=0.2)
+    assert algorithm.get_policy_name() is None
+    monkeypatch.setattr("Algorithms.minimax.get_opening_book", None)
+    game = get_game(small_word_lists)
+    assert algorithm.get_action(game) in game.get_vocabulary()
+    with pytest.raises(ValueError):
+        get_decision_tree(algorithm, game)
+    assert AlphaBeta().get_policy_name() == "alphabeta_depth1"
+
+
+def test_anytime_processes(small_word_lists):
+    game = get_game(small_word_lists, "poppy")
+    actions, depths = [], []
+    for processes in [1, 2]:
+        algorithm = AlphaBeta(processes, time_limit=600, max_depth=2)
+        actions.append(algorithm.choose_action(game))
+        depths.append(algorithm.move_stats[-1]["depth"])
+    assert actions[0] == actions[1]
+    assert depths == [2, 2]
+
+
+def get_agents(processes=1):
+    """Returns depth 2 Minimax, AlphaBeta and Expectimax agents."""
+    agents = [Minimax(processes=processes), AlphaBeta(processes), Expectimax(processes)]
+    for agent in agents:
+        agent.depth = 2
+    return agents
+
+
+def get_best_ids(scores):
+    """Returns the indices of the highest scores - the actions an agent may choose, scored exactly by AlphaBeta."""
+    return np.flatnonzero(np.isclose(scores, scores.max())).tolist()
+
+
+@pytest.mark.parametrize("first_guess", ["eclat", "shrug"])
+def test_transposition_table(small_word_lists, first_guess):
+    # the values stored in the table and its alpha-beta bounds do not change the scores of the actions
+    game = get_game(small_word_lists, first_guess)
+    for agent, table_agent in zip(get_agents(), get_agents()):
+        agent.transposition_table = TranspositionTable(0)
+        scores, table_scores = agent.score_root_actions(game), table_agent.score_root_actions(game)
+        if isinstance(agent, AlphaBeta):
+            assert get_best_ids(table_scores) == get_best_ids(scores)
+        else:
+            assert np.allclose(table_scores, scores)
+        assert table_agent.choose_action(game) == agent.choose_action(game)
+        assert table_agent.transposition_table.hits > 0 and agent.transposition_table.hits == 0
+
+
+@pytest.mark.parametrize("first_guess", ["eclat", "shrug"])
+def test_pattern_buckets(small_word_lists, monkeypatch, first_guess):
+    # the buckets of the patterns of a guess are the possible words its successors filter
+    game = get_game(small_word_lists, first_guess)
+    for word in game.get_possible_words():
+        guess_game = generate_successor(game, MAX, word)
+        buckets = get_pattern_buckets(guess_game)
+        assert sum(count for _, count, _ in buckets) == len(game.get_possible_ids())
+        for pattern, count, bucket in buckets:
+            assert count == len(bucket)
+            assert np.array_equal(generate_successor(guess_game, MIN, pattern).get_possible_ids(), bucket)
+
+    bucket_scores = [agent.score_root_actions(game) for agent in get_agents()]
+    # searching the successors filtered by the games, as in games whose patterns do not depend only on the secret word
+    monkeypatch.setattr("Algorithms.minimax.get_pattern_buckets", lambda min_game: [
+        (pattern, count, None) for pattern, count, _ in get_pattern_buckets(min_game)])
+    for agent, scores in zip(get_agents(), bucket_scores):
+        assert np.allclose(agent.score_root_actions(game), scores)
+
+
+def test_root_processes(small_word_lists, monkeypatch):
+    # splitting the root actions between processes (sharing the highest AlphaBeta score) keeps the moves of one process
+    monkeypatch.setattr("utils.parallel.MIN_PARALLEL_CANDIDATES", 2)
+    game = get_game(small_word_lists, "spawl")
+    for agent, parallel_agent in zip(get_agents(), get_agents(processes=2)):
+        scores, parallel_scores = agent.score_root_actions(game), parallel_agent.score_root_actions(game)
+        if isinstance(agent, AlphaBeta):
+            assert get_best_ids(parallel_scores) == get_best_ids(scores)
+        else:
+            assert np.allclose(parallel_scores, scores)
+        random.seed(0)
+        action = agent.choose_action(game)
+        random.seed(0)
+        assert parallel_agent.choose_action(game) == action
+
+
+def test_sparse_expectimax(small_word_lists):
+    # the sampled scores are the same for the same seed, and exact when every possible word fits in the sample
+    game = get_game(small_word_lists, "poppy")
+    scores = SparseExpectimax(sample_size=16, seed=3).score_root_actions(game)
+    assert np.array_equal(SparseExpectimax(sample_size=16, seed=3).score_root_actions(game), scores)
+
+    game = get_game(small_word_lists, "eclat")
+    expectimax = Expectimax()
+    expectimax.depth = 2
+    sparse_expectimax = SparseExpectimax(sample_size=len(game.get_possible_ids()))
+    assert np.allclose(sparse_expectimax.score_root_actions(game), expectimax.score_root_actions(game))
+    assert sparse_expectimax.choose_action(game) == expectimax.choose_action(game)
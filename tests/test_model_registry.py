@@ -0,0 +1,39 @@
+import numpy as np
+
+from utils.common import GameType
+from utils.model_registry import AGENT_TABULAR, REWARD_TURN, find_model_name, find_words_path, get_model_name, \
+    load_manifest, load_model, load_model_vocabulary, save_model
+from utils.vocabulary import get_vocabulary
+
+
+def test_model_word_lists():
+    # the words of every saved model are found by their hash among the word lists of the data directory
+    for model_name, model in load_manifest().items():
+        vocabulary = load_model_vocabulary(model_name)
+        assert vocabulary.get_hash() == model["vocabulary_hash"]
+        assert len(vocabulary) == model["words"]
+    assert find_words_path("0" * 16) is None
+
+
+def test_save_models(small_word_lists, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.model_registry.MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr("utils.model_registry.MANIFEST_DIR", str(tmp_path / "manifest"))
+    monkeypatch.setattr("utils.model_registry._manifest", None)
+    monkeypatch.setattr("utils.model_registry._loaded_models", {})
+    vocabulary = get_vocabulary(small_word_lists[1])
+    rng = np.random.default_rng(0)
+    models = {game_type: rng.random((1, len(vocabulary)))
+              for game_type in [GameType.BasicWordle, GameType.YellowWordle]}
+    assert load_manifest() == {}
+    for game_type, model in models.items():
+        # saved by processes which read the manifest before the other saved its model
+        monkeypatch.setattr("utils.model_registry._manifest", {})
+        save_model(model, AGENT_TABULAR, game_type, vocabulary, REWARD_TURN)
+
+    monkeypatch.setattr("utils.model_registry._manifest", None)
+    assert len(load_manifest()) == len(models)
+    for game_type, model in models.items():
+        model_name = find_model_name(AGENT_TABULAR, game_type, vocabulary, REWARD_TURN)
+        assert model_name == get_model_name(AGENT_TABULAR, game_type, vocabulary, REWARD_TURN)
+        assert load_manifest()[model_name]["shape"] == list(model.shape)
+        assert np.array_equal(load_model(model_name), model)
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from WordleGames import BasicWordle, YellowWordle
+
+SECRET_WORDS = ["speed", "abide", "there", "eerie", "hello"]
+LEGAL_WORDS = ["llama", "geese", "sassy"] + SECRET_WORDS
+
+
+@pytest.mark.parametrize("game_class", [BasicWordle, YellowWordle])
+def test_pattern_matrices(game_class):
+    game = game_class(SECRET_WORDS, LEGAL_WORDS)
+    legal_matrix, secret_matrix = game.get_pattern_matrix(), game.get_secret_pattern_matrix()
+    assert legal_matrix.codes.shape == (len(LEGAL_WORDS), len(LEGAL_WORDS))
+    assert secret_matrix.codes.shape == (len(LEGAL_WORDS), len(SECRET_WORDS))
+    for guess in LEGAL_WORDS:
+        for secret_id, secret_word in enumerate(SECRET_WORDS):
+            assert legal_matrix.get_code(guess, secret_word) == game.get_pattern(guess, secret_word)
+            assert secret_matrix.get_code(guess, secret_word) == game.get_pattern(guess, secret_word)
+            assert secret_matrix.get_codes(guess, np.array([secret_id]))[0] == game.get_pattern(guess, secret_word)
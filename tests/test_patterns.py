@@ -0,0 +1,66 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from WordleGames import BasicWordle, YellowWordle
+from utils.common import PatternRule
+from utils.patterns import encode_words, get_basic_codes, get_yellow_codes, get_patterns
+
+# pairs whose letters repeat in the guess, the secret word or both
+DUPLICATE_PAIRS = [("speed", "abide"), ("eerie", "there"), ("there", "eerie"), ("abbey", "babes"),
+                   ("llama", "hello"), ("sassy", "essay"), ("geese", "eerie"), ("mamma", "amass"),
+                   ("allee", "eagle"), ("aaaaa", "abaca"), ("abaca", "aaaaa"), ("speed", "speed")]
+
+
+@pytest.fixture(scope="module")
+def games(word_lists):
+    secret_words, legal_words = word_lists
+    return {PatternRule.Basic: BasicWordle(secret_words, legal_words),
+            PatternRule.Yellow: YellowWordle(secret_words, legal_words)}
+
+
+def get_scalar_codes(game, guesses, secrets):
+    """Returns the pattern codes of every guess according to every secret word, computed by game.get_pattern."""
+    return np.array([[game.get_pattern(guess, secret) for secret in secrets] for guess in guesses], dtype=np.uint8)
+
+
+def test_encode_words():
+    letters = encode_words(["abcde", "zzzzz"])
+    assert letters.dtype == np.uint8
+    assert letters.tolist() == [[0, 1, 2, 3, 4], [25, 25, 25, 25, 25]]
+    assert encode_words([]).shape == (0, 5)
+
+
+@pytest.mark.parametrize("rule", [PatternRule.Basic, PatternRule.Yellow])
+def test_duplicate_letters(games, rule):
+    for guess, secret in DUPLICATE_PAIRS:
+        codes = get_patterns(encode_words([guess]), encode_words([secret]), rule)
+        assert codes[0, 0] == games[rule].get_pattern(guess, secret), (guess, secret)
+
+
+@pytest.mark.parametrize("rule", [PatternRule.Basic, PatternRule.Yellow])
+def test_random_word_pairs(games, word_lists, rule):
+    secret_words, legal_words = word_lists
+    rng = random.Random(0)
+    guesses, secrets = rng.sample(legal_words, 200), rng.sample(secret_words, 300)
+    codes = get_patterns(encode_words(guesses), encode_words(secrets), rule)
+    assert np.array_equal(codes, get_scalar_codes(games[rule], guesses, secrets))
+
+
+@pytest.mark.parametrize("rule", [PatternRule.Basic, PatternRule.Yellow])
+def test_all_words_of_few_letters(games, rule):
+    # every word of the letters a, b and c, so every combination of repeated letters is compared
+    words = ["".join(letters) for letters in itertools.product("abc", repeat=5)]
+    codes = get_patterns(encode_words(words), encode_words(words), rule)
+    assert np.array_equal(codes, get_scalar_codes(games[rule], words, words))
+
+
+def test_batches(word_lists, monkeypatch):
+    # the codes do not depend on how the guesses are split into batches
+    secret_words, legal_words = word_lists
+    guesses, secrets = encode_words(legal_words[:100]), encode_words(secret_words[:100])
+    monkeypatch.setattr("utils.patterns.MAX_BATCH_PAIRS", 700)
+    assert np.array_equal(get_patterns(guesses, secrets), get_basic_codes(guesses, secrets))
+    assert np.array_equal(get_patterns(guesses, secrets, PatternRule.Yellow), get_yellow_codes(guesses, secrets))
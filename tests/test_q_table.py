@@ -0,0 +1,20 @@
+import numpy as np
+
+from utils.q_table import ActionRanking
+
+
+def test_action_ranking():
+    # the best actions by rank are the actions tying for the highest Q-value, in the order of the given ids
+    rng = np.random.default_rng(0)
+    words_num = 500
+    all_ids = np.arange(words_num)
+    for values_num in [1, 3, 50, words_num]:  # few distinct Q-values make many ties
+        q_values = rng.integers(-values_num, values_num, words_num) / 7.0
+        ranking = ActionRanking(q_values, all_ids)
+        assert np.array_equal(ranking.get_best_ids(all_ids), np.flatnonzero(q_values == q_values.max()))
+        for size in [1, 2, 20, 300]:
+            action_ids = rng.choice(words_num, size, replace=False)
+            action_q_values = q_values[action_ids]
+            best_ids = action_ids[action_q_values == action_q_values.max()]
+            assert np.array_equal(ranking.get_best_ids(action_ids), best_ids)
+            assert np.array_equal(ranking.get_best_ids(np.sort(action_ids)), np.sort(best_ids))
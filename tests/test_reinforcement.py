@@ -0,0 +1,170 @@
+import random
+
+import numpy as np
+import pytest
+
+from Algorithms.reinforcement import DIFFERENCES, MATCHES, ApproximateQAgent, QLearningAgent, Reinforcement, \
+    train_chunk
+from WordleGames import BasicWordle, NoisyWordle, YellowWordle, Absurdle
+from utils.common import GameType
+from utils.model_registry import AGENT_TABULAR, find_model_name, load_manifest, load_model, load_model_vocabulary
+from utils.parallel import starmap_games
+from utils.q_table import remap_q_table
+from utils.vocabulary import get_vocabulary
+
+UNKNOWN_WORDS = ["qzxjv", "vvxqz", "jjqzx"]  # words the saved agents never saw
+
+
+@pytest.fixture(scope="module")
+def wordle(word_lists):
+    secret_words, legal_words = word_lists
+    return BasicWordle(secret_words, legal_words, game_state=[])
+
+
+@pytest.fixture(scope="module")
+def other_vocabulary_wordle(wordle):
+    """A Wordle game whose words are some of the words of the Wordle game and words unknown to it."""
+    rng = random.Random(0)
+    secret_words = rng.sample(wordle.get_secret_words(), 50)
+    legal_words = UNKNOWN_WORDS + secret_words + rng.sample(wordle.get_legal_words(), 200)
+    return BasicWordle(secret_words, list(dict.fromkeys(legal_words)), game_state=[])
+
+
+def play(algorithm, game):
+    """Plays a game with a random secret word, and returns its guesses."""
+    game.reset()
+    secret_word = game.generate_secret_word()
+    guesses = []
+    while not game.get_done():
+        guess = algorithm.get_action(game)
+        guesses.append(guess)
+        game.step(guess, secret_word)
+    return guesses
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_play_other_vocabulary(wordle, other_vocabulary_wordle, approximate):
+    random.seed(0)
+    algorithm = Reinforcement(wordle, approximate=approximate)
+    guesses = play(algorithm, other_vocabulary_wordle)
+    assert guesses and all(guess in other_vocabulary_wordle.get_vocabulary() for guess in guesses)
+    assert play(algorithm, wordle)  # the agent still plays the game it was built with
+
+
+def test_other_vocabulary_q_values(wordle, other_vocabulary_wordle):
+    algorithm = Reinforcement(wordle)
+    wordle_agent = algorithm.get_playing_agent(wordle)
+    agent = algorithm.get_playing_agent(other_vocabulary_wordle)
+    assert agent is not wordle_agent
+    for word in other_vocabulary_wordle.get_legal_words():
+        expected = 0.0 if word in UNKNOWN_WORDS else wordle_agent.get_q_value(0, word)
+        assert agent.get_q_value(0, word) == expected
+    assert algorithm.get_playing_agent(other_vocabulary_wordle) is agent
+    assert algorithm.get_playing_agent(wordle) is wordle_agent
+    assert np.count_nonzero(agent.Q_values) > 0
+
+
+def test_fallback_model(wordle, other_vocabulary_wordle):
+    # no model was saved for Real-vocabulary games, which are played by the Wordle model
+    secret_words, legal_words = other_vocabulary_wordle.get_secret_words(), other_vocabulary_wordle.get_legal_words()
+    game = BasicWordle(secret_words, legal_words, game_state=[], game_type=GameType.RealVocabularyWordle)
+    algorithm = Reinforcement(game)
+    assert play(algorithm, game)
+    assert np.array_equal(algorithm.get_playing_agent(game).Q_values,
+                          Reinforcement(wordle).get_playing_agent(other_vocabulary_wordle).Q_values)
+
+
+@pytest.mark.parametrize("game_class", [NoisyWordle, YellowWordle, Absurdle])
+def test_play_game_variants(wordle, small_word_lists, game_class, monkeypatch):
+    # playing never saves models, so it never changes the registry
+    monkeypatch.setattr("utils.model_registry.write_atomically", None)
+    game = game_class(*small_word_lists, game_state=[])
+    algorithm = Reinforcement(wordle)  # made with Wordle, like the algorithms of the GUI
+    assert play(algorithm, game)
+    model_name = find_model_name(AGENT_TABULAR, game.get_type(), game.get_vocabulary())
+    assert load_manifest()[model_name]["game"] == game.get_type().value
+    q_table = remap_q_table(load_model(model_name), load_model_vocabulary(model_name), game.get_vocabulary())
+    assert np.array_equal(algorithm.get_playing_agent(game).Q_values, q_table)
+    wordle_game = BasicWordle(*small_word_lists, game_state=[])
+    assert not np.array_equal(algorithm.get_playing_agent(wordle_game).Q_values, q_table)
+
+    approximate_algorithm = Reinforcement(wordle, approximate=True)
+    assert play(approximate_algorithm, game)
+    assert approximate_algorithm.get_playing_agent(game).get_pattern.__self__ is game
+
+
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_training_visits(small_word_lists, monkeypatch, batch_size):
+    game = BasicWordle(*small_word_lists, game_state=[])
+    steps = []
+    if batch_size == 1:  # the episodes are played with the game, so its steps are the updates of the agent
+        step = game.step
+        monkeypatch.setattr(game, "step", lambda guess, secret_word: steps.append(guess) or step(guess, secret_word))
+    algorithm = Reinforcement(game, batch_size=batch_size)
+    episodes_num = 100
+    chunk = (game, False, algorithm.reward, batch_size, algorithm.agent.get_model(), 0, episodes_num, 0.9999, 7)
+    training_state = train_chunk(*chunk)
+    visits = training_state["visits"]
+
+    assert visits.dtype == np.uint32 and visits.shape == (1, len(game.get_vocabulary()))
+    assert episodes_num <= visits.sum() <= episodes_num * game.max_iter
+    if steps:
+        assert visits.sum() == len(steps)
+        assert np.array_equal(np.flatnonzero(visits[0]), np.unique(game.get_vocabulary().get_ids(steps)))
+    # a seeded run updates the same entries the same number of times
+    assert np.array_equal(train_chunk(*chunk)["visits"], visits)
+
+    algorithm.agent.merge_training_states([training_state])
+    stats = algorithm.agent.get_table_stats()
+    assert stats["# Updated Q-values"] == np.count_nonzero(visits)
+    assert stats["# Q-table entries"] == len(game.get_vocabulary())
+    assert stats["Q-table memory (KB)"] == f"{len(game.get_vocabulary()) * (8 + 4) / 1024:.1f}"
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_training_processes(small_word_lists, approximate):
+    # the processes rebuild the agent from its model, so they train the chunks as the process of the algorithm does
+    game = BasicWordle(*small_word_lists, game_state=[])
+    algorithm = Reinforcement(game, approximate=approximate)
+    chunks = [(game, approximate, algorithm.reward, algorithm.batch_size, algorithm.agent.get_model(), start, 20,
+               0.995, seed) for start, seed in [(0, 3), (20, 4)]]
+    parallel_training_states = starmap_games(train_chunk, game, 2, chunks)
+    for training_state, parallel_training_state in zip(starmap_games(train_chunk, game, 1, chunks),
+                                                        parallel_training_states):
+        for name, value in training_state.items():
+            assert np.allclose(parallel_training_state[name], value)
+
+
+def test_update_batch(small_word_lists):
+    # updating a batch of actions (with repeated actions) is updating them one after another in the order of the batch
+    vocabulary = get_vocabulary(small_word_lists[1])
+    rng = np.random.default_rng(0)
+    batch_agent, agent = QLearningAgent(vocabulary), QLearningAgent(vocabulary)
+    batch_agent.set_model(rng.random(batch_agent.Q_values.shape))
+    agent.set_model(np.array(batch_agent.Q_values))
+    action_ids = rng.integers(0, 20, 200)
+    targets = rng.normal(size=len(action_ids))
+    batch_agent.update_batch(0, action_ids, targets, 0.3)
+    for action, target in zip(vocabulary.get_words(action_ids), targets):
+        # with no discount the target is the reward, whatever the value of the next state
+        agent.update(0, action, 0, target, 0.3, 0.0, np.array([], dtype=np.intp))
+    assert np.allclose(batch_agent.Q_values, agent.Q_values)
+    assert np.array_equal(batch_agent.visits, agent.visits)
+
+
+@pytest.mark.parametrize("game_class", [BasicWordle, YellowWordle])
+@pytest.mark.parametrize("fixed_patterns", [True, False])
+def test_features_block(small_word_lists, game_class, fixed_patterns):
+    # the features block of a state holds the features of every action, from the pattern matrix or from get_pattern
+    game = game_class(*small_word_lists, game_state=[])
+    vocabulary = game.get_vocabulary()
+    agent = ApproximateQAgent(vocabulary, game.get_pattern, game.get_pattern_matrix if fixed_patterns else None)
+    agent.set_model(np.array([0.7, -0.2]))
+    action_ids = np.random.default_rng(0).permutation(vocabulary.all_ids)[:50]
+    for state in [(), ("eclat", 0), ("spawl", game.get_pattern("spawl", "shrug")), ("shrug", 100)]:
+        features = agent.get_features_block(state, action_ids)
+        q_values = agent.get_q_values(state, action_ids)
+        for i, action in enumerate(vocabulary.get_words(action_ids)):
+            action_features = agent.get_features(state, action)
+            assert np.allclose(features[i], [action_features[MATCHES], action_features[DIFFERENCES]])
+            assert np.isclose(q_values[i], agent.get_q_value(state, action))
@@ -1,9 +1,17 @@
+import os
 from enum import Enum, IntEnum
 
+# the root directory of the repository and its data directory, found from this file so the files stored under them
+# do not depend on the working directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+
 Word = str
+Pattern = int  # a base-3 code of the placings of a guess, see pattern_to_code
 MAX = 0
 MIN = 1
 LETTERS_NUM = 5
+PATTERNS_NUM = 3 ** LETTERS_NUM
 
 
 class AlgorithmType(str, Enum):
@@ -15,6 +23,9 @@ class AlgorithmType(str, Enum):
     Expectimax = "Expectimax"
     Entropy = "Entropy"
     Reinforcement = "Q-learning"
+    TreePolicy = "Decision-tree"
+    EntropyLookahead = "Entropy-lookahead"
+    SparseExpectimax = "Sparse-Expectimax"
 
 
 class GameType(str, Enum):
@@ -27,6 +38,12 @@ class GameType(str, Enum):
     YellowWordle = "Yellow-Wordle"
 
 
+class PatternRule(str, Enum):
+    """An Enum for the rules used to compute the pattern of a guess according to the secret word"""
+    Basic = "basic"
+    Yellow = "yellow"
+
+
 class Placing(IntEnum):
     """An Enum for representing the placing color of every letter"""
     correct = 0
@@ -34,11 +51,31 @@ class Placing(IntEnum):
     incorrect = 2
 
 
-WINNING_PATTERN = tuple([Placing.correct.value for _ in range(LETTERS_NUM)])
-LOSING_PATTERN = tuple([Placing.incorrect.value]*LETTERS_NUM)
+def pattern_to_code(pattern):
+    """Encodes a pattern as a base-3 integer in the range [0, PATTERNS_NUM), the first letter being the most
+    significant digit, so the codes follow the same order as itertools.product over the placings."""
+    code = 0
+    for placing in pattern:
+        code = code * 3 + int(placing)
+    return code
+
+
+def code_to_pattern(code):
+    """Decodes a base-3 pattern code back to a list containing the placing of each letter."""
+    pattern = [0] * LETTERS_NUM
+    for i in range(LETTERS_NUM - 1, -1, -1):
+        code, pattern[i] = divmod(int(code), 3)
+    return pattern
+
+
+# the placings of every pattern code, so code placings are looked up instead of decoded on the hot paths
+PATTERN_PLACINGS = tuple(tuple(code_to_pattern(code)) for code in range(PATTERNS_NUM))
+WINNING_PATTERN = pattern_to_code([Placing.correct.value for _ in range(LETTERS_NUM)])
+LOSING_PATTERN = pattern_to_code([Placing.incorrect.value]*LETTERS_NUM)
 
-def get_pattern_vanilla(guess: Word, secret_word: Word):
-    """Returns a list containing the placing of each letter in the guess according to the secret word
+
+def get_pattern_vanilla(guess: Word, secret_word: Word) -> Pattern:
+    """Returns the pattern code of the placing of each letter in the guess according to the secret word
     like basic Wordle"""
     pool = {}
     for g, s in zip(guess, secret_word):
@@ -49,13 +86,31 @@ def get_pattern_vanilla(guess: Word, secret_word: Word):
         else:
             pool[s] = 1
 
-    pattern = []
+    pattern = 0
     for guess_letter, solution_letter in zip(guess, secret_word):
+        pattern *= 3
         if guess_letter == solution_letter:
-            pattern.append(int(Placing.correct))
+            pattern += int(Placing.correct)
         elif guess_letter in secret_word and guess_letter in pool and pool[guess_letter] > 0:
-            pattern.append(int(Placing.misplaced))
+            pattern += int(Placing.misplaced)
             pool[guess_letter] -= 1
         else:
-            pattern.append(int(Placing.incorrect))
+            pattern += int(Placing.incorrect)
+    return pattern
+
+
+def get_pattern_yellow(guess: Word, secret_word: Word) -> Pattern:
+    """Returns the pattern code of the placing of each letter in the guess according to the secret word
+    like Yellow Wordle, where a letter is either misplaced (present in the secret word) or incorrect."""
+    target_word = list(secret_word)
+    pattern = 0
+
+    for i in range(LETTERS_NUM):
+        pattern *= 3
+        if guess[i] in target_word:
+            target_word.remove(guess[i])
+            pattern += int(Placing.misplaced)
+        else:
+            pattern += int(Placing.incorrect)
+
     return pattern
@@ -0,0 +1,175 @@
+import os
+import random
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+from utils.common import DATA_DIR, Word
+from utils.vocabulary import word_list_hash
+
+DECISION_TREE_DIR = os.path.join(DATA_DIR, "decision_trees")
+DECISION_TREE_VERSION = 1
+MAX_TREE_DEPTH = 20  # the depth limit of the trees of games without a maximum number of guesses
+NO_GUESS = -1  # the guess id of the nodes where the algorithm had no word to guess
+
+# decision trees already loaded by this process, keyed by (policy name, game type, id(legal_words), id(secret_words))
+_loaded_trees = {}
+
+
+class DecisionTree:
+    """
+    The compiled decision tree of a deterministic algorithm over all the secret words of a game.
+    Node 0 is the root (the empty game), guess_ids[node] is the vocabulary id of the guess the algorithm makes at the
+    node, and the children of the node are stored from child_offsets[node] to child_offsets[node + 1] in
+    child_patterns and child_nodes - the pattern code answering the guess and the node reached by it.
+    secret_guesses[i] is the number of guesses the algorithm takes to find the i-th secret word (0 if it fails).
+    """
+    def __init__(self, guess_ids, child_offsets, child_patterns, child_nodes, secret_guesses, legal_words,
+                 secret_words):
+        """Initializes the decision tree with its arrays and the word lists of the game it was compiled for."""
+        self.guess_ids = guess_ids
+        self.child_offsets = child_offsets
+        self.child_patterns = child_patterns
+        self.child_nodes = child_nodes
+        self.secret_guesses = secret_guesses
+        self.legal_words = legal_words
+        self.secret_words = secret_words
+        # a {pattern code: child node} dictionary per node, so every step down the tree is a dictionary lookup
+        self.children = [dict(zip(child_patterns[start:end].tolist(), child_nodes[start:end].tolist()))
+                         for start, end in zip(child_offsets[:-1].tolist(), child_offsets[1:].tolist())]
+
+    def get_nodes_num(self) -> int:
+        """Returns the number of nodes in the tree."""
+        return len(self.guess_ids)
+
+    def get_guess(self, node: int) -> Optional[Word]:
+        """Returns the guess of the algorithm at the node."""
+        guess_id = int(self.guess_ids[node])
+        return None if guess_id == NO_GUESS else self.legal_words[guess_id]
+
+    def get_node(self, game_state) -> Optional[int]:
+        """Returns the node of the given game state (a list of (guess, pattern code) tuples), or None if the state
+        leaves the tree."""
+        node = 0
+        for guess, pattern in game_state:
+            if guess != self.get_guess(node):
+                return None
+            node = self.children[node].get(pattern)
+            if node is None:
+                return None
+        return node
+
+    def get_secret_guesses(self):
+        """Returns a dictionary of the number of guesses the algorithm takes to find every secret word (0 if it
+        fails)."""
+        return dict(zip(self.secret_words, self.secret_guesses.tolist()))
+
+    def get_depth_stats(self):
+        """Returns statistics of the number of guesses the algorithm takes over all the secret words."""
+        solved = self.secret_guesses > 0
+        solved_guesses = self.secret_guesses[solved]
+        return {"secret_words_num": len(self.secret_guesses),
+                "win_percentage": float(solved.mean()) * 100.0 if len(solved) else 0.0,
+                "average_guesses": float(solved_guesses.mean()) if len(solved_guesses) else 0.0,
+                "max_guesses": int(solved_guesses.max()) if len(solved_guesses) else 0,
+                "guesses_histogram": dict(sorted(Counter(solved_guesses.tolist()).items()))}
+
+
+def compile_decision_tree(algorithm, game) -> DecisionTree:
+    """
+    Compiles the decision tree of a deterministic algorithm for the game.
+    The algorithm is played once over all the secret words together: at every node it makes a single guess, the
+    secret words reaching the node are split by the pattern code of the guess from the game's legal x secret pattern
+    matrix, and a child node is expanded for every pattern, so the work at common prefixes of the games is shared.
+    The global random state is restored afterwards, so compiling a tree does not change the games that follow.
+    """
+    if not game.fixed_patterns:
+        raise ValueError(f"the patterns of {game.get_type().value} games do not depend only on the secret word")
+    random_state = random.getstate()
+    root = game.successor_creator()
+    root.reset()
+    vocabulary = root.get_vocabulary()
+    pattern_matrix = root.get_secret_pattern_matrix()
+    secret_ids = vocabulary.get_ids(game.get_secret_words())
+    max_depth = game.max_iter if game.max_iter is not None else MAX_TREE_DEPTH
+
+    guess_ids = []
+    children = []
+    secret_guesses = np.zeros(len(secret_ids), dtype=np.int8)
+
+    def expand(node_game, secrets):
+        """Adds the node of the game reached by the secret words with the given indices, and its subtree."""
+        node = len(guess_ids)
+        guess = algorithm.get_action(node_game)
+        guess_ids.append(NO_GUESS if guess is None else vocabulary.get_id(guess))
+        children.append({})
+        if guess is None:
+            return node
+        depth = node_game.get_turn_num()
+        solved = secret_ids[secrets] == guess_ids[node]
+        secret_guesses[secrets[solved]] = depth
+        secrets = secrets[~solved]
+        if depth >= max_depth or not len(secrets):
+            return node
+        codes = pattern_matrix.get_codes(guess, secrets)  # the secret words are the columns of the matrix
+        for code in np.unique(codes).tolist():
+            successor = node_game.successor_creator()
+            successor.apply_action(guess)
+            successor.apply_opponent_action(code)
+            children[node][code] = expand(successor, secrets[codes == code])
+        return node
+
+    expand(root, np.arange(len(secret_ids)))
+    random.setstate(random_state)
+
+    child_offsets = np.zeros(len(guess_ids) + 1, dtype=np.int32)
+    child_offsets[1:] = np.cumsum([len(node_children) for node_children in children])
+    child_patterns = np.array([code for node_children in children for code in node_children], dtype=np.uint8)
+    child_nodes = np.array([child for node_children in children for child in node_children.values()],
+                           dtype=np.int32)
+    return DecisionTree(np.array(guess_ids, dtype=np.int32), child_offsets, child_patterns, child_nodes,
+                        secret_guesses, game.get_legal_words(), game.get_secret_words())
+
+
+def get_tree_path(policy_name, game):
+    """Returns the cache file path of the decision tree of the named policy for the game's type and word lists."""
+    words_hash = word_list_hash(game.get_legal_words(), game.get_secret_words())
+    return os.path.join(DECISION_TREE_DIR, f"{policy_name}_{game.get_type().value}_v{DECISION_TREE_VERSION}_"
+                                           f"{words_hash}.npz")
+
+
+def get_decision_tree(algorithm, game) -> DecisionTree:
+    """
+    Returns the decision tree of the algorithm for the game.
+    The tree is compiled once per algorithm (as named by algorithm.get_policy_name()), game type and word lists,
+    and stored as a .npz file keyed by a hash of the word lists. Algorithms whose moves depend on a time limit (with
+    no policy name) have no tree.
+    """
+    policy_name = algorithm.get_policy_name()
+    if policy_name is None:
+        raise ValueError(f"the moves of {algorithm.type.value} depend on its time limit, so they are not cached")
+    legal_words, secret_words = game.get_legal_words(), game.get_secret_words()
+    key = (policy_name, game.get_type(), id(legal_words), id(secret_words))
+    if key in _loaded_trees:
+        tree = _loaded_trees[key]
+        if tree.legal_words is legal_words and tree.secret_words is secret_words:
+            return tree
+
+    path = get_tree_path(policy_name, game)
+    if os.path.isfile(path):
+        with np.load(path) as arrays:
+            tree = DecisionTree(arrays["guess_ids"], arrays["child_offsets"], arrays["child_patterns"],
+                                arrays["child_nodes"], arrays["secret_guesses"], legal_words, secret_words)
+    else:
+        tree = compile_decision_tree(algorithm, game)
+        os.makedirs(DECISION_TREE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, guess_ids=tree.guess_ids, child_offsets=tree.child_offsets,
+                     child_patterns=tree.child_patterns, child_nodes=tree.child_nodes,
+                     secret_guesses=tree.secret_guesses)
+        os.replace(tmp_path, path)  # atomic, so other processes never see a partially written tree
+
+    _loaded_trees[key] = tree
+    return tree
@@ -1,4 +1,5 @@
-from Algorithms import Random, TotalRandom, Minimax, AlphaBeta, Expectimax, Entropy, Reinforcement
+from Algorithms import Random, TotalRandom, Minimax, AlphaBeta, Expectimax, SparseExpectimax, Entropy, \
+    EntropyLookahead, Reinforcement, TreePolicy
 from WordleGames import BasicWordle, Absurdle, NoisyWordle, YellowWordle
 from WordleGames.vocabulary_wordle import VocabularyWordle
 from WordleGames.abstract_wordle import AbstractWordle
@@ -37,25 +38,34 @@ def get_game(secret_words, legal_words, game_type: GameType, real_size=1000, fak
     return game
 
 
-def get_algorithm(algorithm_type: AlgorithmType, game: AbstractWordle):
+def get_algorithm(algorithm_type: AlgorithmType, game: AbstractWordle, hard_mode=True, processes=1, time_limit=None):
     """
     Initializes a game based on AlgorithmType
     game is the type of game that RL should study
+    hard_mode is whether the Entropy algorithm (and its decision tree) guesses only possible words (or every legal word)
+    processes is the number of processes the Entropy and adversarial algorithms score their candidates with
+    time_limit is the number of seconds the AlphaBeta (anytime) and Entropy lookahead algorithms search every move for
     """
     if algorithm_type == AlgorithmType.Random:
         algorithm = Random()
     elif algorithm_type == AlgorithmType.TotalRandom:
         algorithm = TotalRandom()
     elif algorithm_type == AlgorithmType.Minimax:
-        algorithm = Minimax()
+        algorithm = Minimax(processes=processes)
     elif algorithm_type == AlgorithmType.AlphaBeta:
-        algorithm = AlphaBeta()
+        algorithm = AlphaBeta(processes, time_limit)
     elif algorithm_type == AlgorithmType.Expectimax:
-        algorithm = Expectimax()
+        algorithm = Expectimax(processes)
+    elif algorithm_type == AlgorithmType.SparseExpectimax:
+        algorithm = SparseExpectimax(processes)
     elif algorithm_type == AlgorithmType.Entropy:
-        algorithm = Entropy()
+        algorithm = Entropy(hard_mode, processes)
     elif algorithm_type == AlgorithmType.Reinforcement:
         algorithm = Reinforcement(game, train=False)
+    elif algorithm_type == AlgorithmType.EntropyLookahead:
+        algorithm = EntropyLookahead(hard_mode, processes, time_limit=time_limit)
+    elif algorithm_type == AlgorithmType.TreePolicy:
+        algorithm = TreePolicy(Entropy(hard_mode, processes))
     else:
         raise Exception(f"{algorithm_type} is not valid algorithm")
     return algorithm
@@ -28,6 +28,10 @@ class Grid:
             self.matrix[self.current_row][self.current_column].assign_letter(letter)
             self.current_column += 1
 
+    def is_full(self):
+        """Returns whether every row of the grid was submitted."""
+        return self.current_row == len(self.matrix)
+
     def submit_word(self, verdict):
         hash = {"g": GREEN, "b": GREY, "y": YELLOW}
         for j, cell in enumerate(self.matrix[self.current_row]):
@@ -123,6 +127,8 @@ class GraphicalInterface:
 
     def event_handler(self, guess, verdict):
         # print(f"TARGET WORD: {self.target_word}, guess: {guess}")
+        if self.grid.is_full():  # games without a limit of guesses (Absurdle) may go on after the last row
+            return
         for letter in guess:
             self.grid.enter_letter(letter)
         current_verdict = self.generate_verdict(verdict)
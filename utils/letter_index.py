@@ -0,0 +1,60 @@
+import numpy as np
+
+from utils.common import LETTERS_NUM
+
+ALPHABET_SIZE = 26
+
+
+def letter_id(letter: str) -> int:
+    """Returns the index of a letter in the alphabet ('a' is 0)."""
+    return ord(letter) - ord('a')
+
+
+class LetterIndex:
+    """
+    An index of precomputed bitmasks over a word list, packed with np.packbits (bit i stands for the word with id i).
+    It holds a mask per (position, letter), a mask per letter of the words containing it, and a mask per
+    (letter, k) of the words containing at least k copies of it, so every filtering rule of a Wordle game is a
+    bitwise operation over the packed masks instead of a Python scan of the words.
+    """
+    def __init__(self, letters: np.ndarray):
+        """Builds the masks of a word list given its letters, encoded with encode_words."""
+        self.words_num = len(letters)
+        alphabet = np.arange(ALPHABET_SIZE, dtype=np.uint8)
+        letter_counts = (letters[:, :, None] == alphabet).sum(axis=1)
+        # position_masks[i, l] - the words with the letter l in position i
+        self.position_masks = np.packbits(letters.T[:, None, :] == alphabet[None, :, None], axis=-1)
+        # count_masks[l, k] - the words with at least k copies of the letter l
+        self.count_masks = np.packbits(letter_counts.T[:, None, :] >= np.arange(LETTERS_NUM + 1)[None, :, None],
+                                       axis=-1)
+        # contains_masks[l] - the words containing the letter l
+        self.contains_masks = self.count_masks[:, 1]
+        self.all_words_mask = self.count_masks[0, 0]
+        # letter_positions[w, l] - the positions of the letter l in the word with id w, as a bitmask (bit i for
+        # position i), which is not packed since it is looked up per word
+        position_bits = (1 << np.arange(LETTERS_NUM, dtype=np.uint8))[None, :, None]
+        self.letter_positions = ((letters[:, :, None] == alphabet) * position_bits).sum(axis=1, dtype=np.uint8)
+
+    def position_mask(self, idx: int, letter: str) -> np.ndarray:
+        """Returns the mask of the words with the letter in the given position."""
+        return self.position_masks[idx, letter_id(letter)]
+
+    def contains_mask(self, letter: str) -> np.ndarray:
+        """Returns the mask of the words containing the letter."""
+        return self.contains_masks[letter_id(letter)]
+
+    def at_least_mask(self, letter: str, count: int) -> np.ndarray:
+        """Returns the mask of the words containing at least count copies of the letter."""
+        if count > LETTERS_NUM:
+            return np.zeros_like(self.all_words_mask)
+        return self.count_masks[letter_id(letter), count]
+
+    def at_most_mask(self, letter: str, count: int) -> np.ndarray:
+        """Returns the mask of the words containing at most count copies of the letter."""
+        if count >= LETTERS_NUM:
+            return self.all_words_mask
+        return ~self.count_masks[letter_id(letter), count + 1]
+
+    def filter_ids(self, ids: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Returns the ids (in the same order) of the words in the mask."""
+        return ids[np.unpackbits(mask, count=self.words_num).view(bool)[ids]]
@@ -0,0 +1,222 @@
+import glob
+import json
+import os
+import pickle
+from typing import List, Optional
+
+import numpy as np
+
+from utils.common import DATA_DIR, GameType, ROOT_DIR
+from utils.q_table import convert_q_values
+from utils.vocabulary import Vocabulary, get_vocabulary, word_list_hash
+
+MODEL_DIR = os.path.join(ROOT_DIR, "Algorithms", "saved_rl_agents")
+CHECKPOINT_DIR = os.path.join(MODEL_DIR, "checkpoints")
+MANIFEST_DIR = os.path.join(MODEL_DIR, "manifest")  # the descriptions of the models, a .json file per model
+MODEL_VERSION = 1
+# the word lists the models may be saved for, whose words are found by the hashes of their vocabularies
+WORD_LIST_PATTERNS = [os.path.join(DATA_DIR, "*.txt"), os.path.join(DATA_DIR, "vocab_word_lists", "*.txt")]
+
+# the kinds of agents
+AGENT_TABULAR = "tabular"  # a Q-table, a states x words array
+AGENT_APPROXIMATE = "approximate"  # the weights of the features
+
+# the reward functions the agents are trained with
+REWARD_CONSTANT = "constant"  # constant_rewards
+REWARD_TURN = "turn"  # turn_rewards
+
+# the game type whose models play the game types no model was saved for (such as Real-vocabulary games)
+FALLBACK_GAME_TYPE = GameType.BasicWordle
+
+# the pickles the agents were saved as before the registry, by (agent kind, game type, reward function)
+LEGACY_PICKLES = {
+    (AGENT_TABULAR, GameType.BasicWordle, REWARD_CONSTANT): "wordle",
+    (AGENT_TABULAR, GameType.BasicWordle, REWARD_TURN): "wordle_turn",
+    (AGENT_TABULAR, GameType.Absurdle, REWARD_CONSTANT): "absurdle",
+    (AGENT_TABULAR, GameType.NoisyWordle, REWARD_CONSTANT): "noisy",
+    (AGENT_TABULAR, GameType.YellowWordle, REWARD_CONSTANT): "yellow",
+    (AGENT_TABULAR, GameType.FakeVocabularyWordle, REWARD_CONSTANT): "fake",
+}
+LEGACY_PICKLES.update({(AGENT_APPROXIMATE, game_type, REWARD_CONSTANT): "approximate" for game_type in GameType
+                       if game_type != GameType.RealVocabularyWordle})
+
+# the manifest of the saved models as read by this process (None until it is first needed)
+_manifest = None
+# models already loaded by this process, keyed by their names
+_loaded_models = {}
+# the paths of the word lists of WORD_LIST_PATTERNS, keyed by their hashes (None until they are first needed)
+_word_list_paths = None
+# word lists of the saved models already loaded by this process, keyed by their hashes
+_loaded_words = {}
+
+
+def get_model_name(agent_kind, game_type: GameType, vocabulary: Vocabulary, reward=REWARD_CONSTANT):
+    """Returns the name of the model of the agent kind for the game type, the words of the vocabulary and the reward
+    function."""
+    return f"{agent_kind}_{game_type.value}_{reward}_v{MODEL_VERSION}_{vocabulary.get_hash()}"
+
+
+def find_words_path(words_hash) -> Optional[str]:
+    """Returns the path of the word list of WORD_LIST_PATTERNS with the given hash (the hash of the vocabulary of its
+    words), or None if there is no such word list, hashing the word lists once per process."""
+    global _word_list_paths
+    if _word_list_paths is None:
+        _word_list_paths = {}
+        for path in sorted(path for pattern in WORD_LIST_PATTERNS for path in glob.glob(pattern)):
+            with open(path) as f:
+                _word_list_paths.setdefault(word_list_hash(f.read().splitlines()), path)
+    return _word_list_paths.get(words_hash)
+
+
+def get_description_path(model_name):
+    """Returns the file path of the description of the model with the given name in the manifest."""
+    return os.path.join(MANIFEST_DIR, f"{model_name}.json")
+
+
+def load_manifest():
+    """Returns the manifest of the saved models - a dictionary of the descriptions of the models by their names, read
+    from their files in MANIFEST_DIR - read once per process."""
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        for path in sorted(glob.glob(get_description_path("*"))):
+            with open(path) as fp:
+                _manifest[os.path.splitext(os.path.basename(path))[0]] = json.load(fp)
+    return _manifest
+
+
+def write_atomically(path, write, mode='wb'):
+    """Writes a file with write(file object) to a temporary file replacing the path when it is complete, so other
+    processes never see a partially written file (and a process stopped while writing leaves the previous one)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def save_model(model: np.ndarray, agent_kind, game_type: GameType, vocabulary: Vocabulary, reward=REWARD_CONSTANT,
+               source="training", file_name=None):
+    """
+    Saves the model (the Q-table or the weights) of an agent of the given kind for the game type, the words of the
+    vocabulary and the reward function as a .npy file (named after the model unless file_name is given, so models
+    with the same content can share a file), and describes it in the manifest with the hash of the vocabulary.
+    Every file is replaced atomically and the description is written last, so a process stopped while saving leaves
+    the previous model. Every model has its own description file, so processes saving models at the same time never
+    drop each other's descriptions. Models are saved only by training and by migrate_legacy_models, never while
+    playing.
+    """
+    model_name = get_model_name(agent_kind, game_type, vocabulary, reward)
+    file_name = f"{model_name}.npy" if file_name is None else file_name
+    write_atomically(os.path.join(MODEL_DIR, file_name), lambda f: np.save(f, model))
+
+    description = {"version": MODEL_VERSION, "agent": agent_kind, "game": game_type.value, "reward": reward,
+                   "file": file_name, "vocabulary_hash": vocabulary.get_hash(), "words": len(vocabulary),
+                   "shape": list(model.shape), "dtype": np.asarray(model).dtype.str, "source": source}
+    write_atomically(get_description_path(model_name),
+                     lambda fp: json.dump(description, fp, indent=2, sort_keys=True), mode='w')
+    if _manifest is not None:
+        _manifest[model_name] = description
+    _loaded_models.pop(model_name, None)
+
+
+def find_model_name(agent_kind, game_type: GameType, vocabulary: Vocabulary, reward=REWARD_CONSTANT) -> Optional[str]:
+    """
+    Returns the name of the saved model of the agent kind and reward function playing games of the game type with
+    the words of the vocabulary: the model of the game type for the words, or else a model of the game type for other
+    words of the data directory (which it is mapped from by word), or else a model of FALLBACK_GAME_TYPE in the same
+    order. Returns None if there is no such model.
+    """
+    models = load_manifest()
+    for model_game_type in dict.fromkeys([game_type, FALLBACK_GAME_TYPE]):
+        model_name = get_model_name(agent_kind, model_game_type, vocabulary, reward)
+        if model_name in models:
+            return model_name
+        other_names = [name for name, model in sorted(models.items()) if model["agent"] == agent_kind and
+                       model["game"] == model_game_type.value and model["reward"] == reward and
+                       find_words_path(model["vocabulary_hash"]) is not None]
+        if other_names:
+            return other_names[0]
+    return None
+
+
+def load_model(model_name) -> np.ndarray:
+    """Returns the saved model with the given name, memory mapped read-only from its file once per process (so the
+    pages of the model are read only when used, and shared by the agents of the process)."""
+    if model_name not in _loaded_models:
+        path = os.path.join(MODEL_DIR, load_manifest()[model_name]["file"])
+        _loaded_models[model_name] = np.load(path, mmap_mode='r')
+    return _loaded_models[model_name]
+
+
+def load_model_vocabulary(model_name) -> Vocabulary:
+    """Returns the vocabulary of the words the saved model with the given name was saved for - the word list of the
+    data directory with the hash of the model's vocabulary (see find_words_path) - read once per process."""
+    words_hash = load_manifest()[model_name]["vocabulary_hash"]
+    if words_hash not in _loaded_words:
+        words_path = find_words_path(words_hash)
+        if words_path is None:
+            raise FileNotFoundError(f"No word list in {DATA_DIR} has the words of {model_name}")
+        with open(words_path) as f:
+            _loaded_words[words_hash] = f.read().splitlines()
+    return get_vocabulary(_loaded_words[words_hash])
+
+
+def load_legacy_model(legacy_name, agent_kind, vocabulary: Vocabulary) -> np.ndarray:
+    """Returns the model of the agent pickled as a util.Counter with the given name - the Q-table of the words of the
+    vocabulary it holds Q-values of (others are dropped), or the weights of the features by their indices."""
+    with open(os.path.join(MODEL_DIR, f"{legacy_name}.pkl"), 'rb') as f:
+        values = pickle.load(f)
+    if agent_kind == AGENT_APPROXIMATE:
+        weights = np.zeros(max(values.keys(), default=-1) + 1)
+        weights[list(values.keys())] = list(values.values())
+        return weights
+    return convert_q_values(values, vocabulary)
+
+
+def get_checkpoint_path(agent_kind, game_type: GameType, vocabulary: Vocabulary, reward=REWARD_CONSTANT):
+    """Returns the file path of the training checkpoint of the model of the agent kind for the game type, the words of
+    the vocabulary and the reward function."""
+    return os.path.join(CHECKPOINT_DIR, f"{get_model_name(agent_kind, game_type, vocabulary, reward)}.npz")
+
+
+def save_checkpoint(path, arrays):
+    """Saves a training checkpoint - a dictionary of arrays by name - as a .npz file."""
+    # atomic, so a training stopped while saving resumes from the previous checkpoint
+    write_atomically(path, lambda f: np.savez(f, **arrays))
+
+
+def load_checkpoint(path):
+    """Returns the dictionary of arrays of the training checkpoint in the given .npz file."""
+    with np.load(path) as arrays:
+        return dict(arrays)
+
+
+def migrate_legacy_models(games) -> List[str]:
+    """
+    Saves every agent pickled by older versions which plays one of the given games (with its vocabulary) to the
+    registry, and returns the names of the migrated models. The models converted from the same pickle without a
+    vocabulary (the weights of the approximate agent) share one file.
+    Run once with python -m utils.model_registry.
+    """
+    model_names = []
+    for game in games:
+        vocabulary = game.get_vocabulary()
+        for (agent_kind, game_type, reward), legacy_name in LEGACY_PICKLES.items():
+            if game_type == game.get_type():
+                file_name = f"{legacy_name}_v{MODEL_VERSION}.npy" if agent_kind == AGENT_APPROXIMATE else None
+                save_model(load_legacy_model(legacy_name, agent_kind, vocabulary), agent_kind, game_type, vocabulary,
+                           reward, source=f"{legacy_name}.pkl", file_name=file_name)
+                model_names.append(get_model_name(agent_kind, game_type, vocabulary, reward))
+    return model_names
+
+
+if __name__ == '__main__':
+    from utils.factory import load_word_lists, get_game
+
+    secret_words, legal_words = load_word_lists()
+    # Real-vocabulary games are played by the Wordle models, with their words mapped by word
+    migrated_games = [get_game(secret_words, legal_words, game_type) for game_type in GameType
+                      if game_type != GameType.RealVocabularyWordle]
+    for migrated_name in migrate_legacy_models(migrated_games):
+        print(f"Migrated {migrated_name}")
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
 
-from utils.common import Placing, AlgorithmType, GameType
+from utils.common import Placing, AlgorithmType, GameType, code_to_pattern
 from utils.factory import *
 
 WORD_LEN = 5
@@ -240,9 +240,9 @@ class WordleApp(tk.Tk):
         self.current_guess = 0
 
     def update_board(self, guess, pattern):
-        """This method updates the game board."""
+        """This method updates the game board given the guess and its pattern code."""
         colors = []
-        for placing in pattern:
+        for placing in code_to_pattern(pattern):
             if placing == int(Placing.correct):
                 colors.append(COLOR_CORRECT)
             elif placing == int(Placing.misplaced):
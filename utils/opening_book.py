@@ -0,0 +1,104 @@
+import json
+import os
+import random
+from typing import Dict, Optional
+
+from utils.common import DATA_DIR, Pattern, Word, WINNING_PATTERN
+from utils.vocabulary import word_list_hash
+
+OPENING_BOOK_DIR = os.path.join(DATA_DIR, "opening_books")
+OPENING_BOOK_VERSION = 1
+OPENING_TURNS = 2  # the turns answered by the opening book
+
+# opening books already loaded by this process, keyed by (book name, game type, id(legal_words), id(secret_words))
+_loaded_books = {}
+
+
+class OpeningBook:
+    """
+    The precomputed guesses of an algorithm for the first two turns of a game - the best first guess, and the best
+    second guess for every pattern the first guess may get - so the algorithm answers them with a lookup.
+    """
+    def __init__(self, first_guess: Word, second_guesses: Dict[Pattern, Word], legal_words, secret_words):
+        """Initializes the opening book with its guesses and the word lists of the game it was computed for."""
+        self.first_guess = first_guess
+        self.second_guesses = second_guesses
+        self.legal_words = legal_words
+        self.secret_words = secret_words
+
+    def get_guess(self, game_state) -> Optional[Word]:
+        """Returns the book guess for the given game state, or None if the state is not in the book."""
+        if not game_state:
+            return self.first_guess
+        if len(game_state) == 1:
+            guess, pattern = game_state[0]
+            if guess == self.first_guess:
+                return self.second_guesses.get(pattern)
+        return None
+
+
+def compute_opening_book(algorithm, game) -> OpeningBook:
+    """
+    Computes the opening book of the algorithm for the game by running the algorithm's own search
+    (algorithm.choose_action) on the empty game, and on the game after the first guess for every pattern leaving
+    possible words. The global random state is restored afterwards, so computing a book does not change the games
+    that follow.
+    """
+    random_state = random.getstate()
+    root = game.successor_creator()
+    root.reset()
+    first_guess = algorithm.choose_action(root)
+    second_guesses = {}
+    for pattern in root.get_all_patterns():
+        if pattern == WINNING_PATTERN:
+            continue
+        successor = root.successor_creator()
+        successor.apply_action(first_guess)
+        successor.apply_opponent_action(pattern)
+        if len(successor.get_possible_ids()):
+            second_guesses[pattern] = algorithm.choose_action(successor)
+    random.setstate(random_state)
+    return OpeningBook(first_guess, second_guesses, game.get_legal_words(), game.get_secret_words())
+
+
+def get_book_path(book_name, game):
+    """Returns the cache file path of the opening book with the given name for the game's type and word lists."""
+    words_hash = word_list_hash(game.get_legal_words(), game.get_secret_words())
+    return os.path.join(OPENING_BOOK_DIR, f"{book_name}_{game.get_type().value}_v{OPENING_BOOK_VERSION}_"
+                                          f"{words_hash}.json")
+
+
+def get_opening_book(algorithm, game) -> OpeningBook:
+    """
+    Returns the opening book of the algorithm for the game.
+    The book is computed once per algorithm (as named by algorithm.get_policy_name()), game type and word
+    lists, and stored as a json file keyed by a hash of the word lists, so it fits any vocabulary. Algorithms whose
+    moves depend on a time limit (with no policy name) have no book.
+    """
+    book_name = algorithm.get_policy_name()
+    if book_name is None:
+        raise ValueError(f"the moves of {algorithm.type.value} depend on its time limit, so they are not cached")
+    legal_words, secret_words = game.get_legal_words(), game.get_secret_words()
+    key = (book_name, game.get_type(), id(legal_words), id(secret_words))
+    if key in _loaded_books:
+        book = _loaded_books[key]
+        if book.legal_words is legal_words and book.secret_words is secret_words:
+            return book
+
+    path = get_book_path(book_name, game)
+    if os.path.isfile(path):
+        with open(path) as fp:
+            book_json = json.load(fp)
+        second_guesses = {int(pattern): guess for pattern, guess in book_json["second_guesses"].items()}
+        book = OpeningBook(book_json["first_guess"], second_guesses, legal_words, secret_words)
+    else:
+        book = compute_opening_book(algorithm, game)
+        os.makedirs(OPENING_BOOK_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as fp:
+            json.dump({"version": OPENING_BOOK_VERSION, "algorithm": book_name, "game": game.get_type().value,
+                       "first_guess": book.first_guess, "second_guesses": book.second_guesses}, fp)
+        os.replace(tmp_path, path)  # atomic, so other processes never see a partially written book
+
+    _loaded_books[key] = book
+    return book
@@ -0,0 +1,192 @@
+import atexit
+from multiprocessing import Pool, resource_tracker, shared_memory
+
+import numpy as np
+
+from utils.common import LETTERS_NUM
+from utils.pattern_matrix import add_pattern_matrix, get_pattern_matrix
+from utils.vocabulary import get_vocabulary
+
+# the smallest number of candidates worth splitting over the processes of a scoring pool
+MIN_PARALLEL_CANDIDATES = 64
+
+# word data published by this process, keyed by (id(legal_words), id(secret_words), pattern rule)
+_published_words = {}
+# word data attached by this (worker) process, keyed by the name of the shared memory block of the letters
+_attached_words = {}
+# scoring pools of this process, keyed by the number of processes
+_scoring_pools = {}
+
+
+class SharedArray:
+    """A NumPy array in a shared memory block, which other processes attach to by its descriptor."""
+    def __init__(self, shm: shared_memory.SharedMemory, shape, dtype, owner: bool):
+        """Initializes the array over the shared memory block. The owner of the block unlinks it when released."""
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.owner = owner
+
+    @classmethod
+    def create(cls, array: np.ndarray):
+        """Creates a shared memory block holding a copy of the array."""
+        shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        shared_array = cls(shm, array.shape, array.dtype, owner=True)
+        shared_array.array[...] = array
+        return shared_array
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Attaches to the shared array with the given descriptor."""
+        name, shape, dtype = descriptor
+        return cls(shared_memory.SharedMemory(name=name), shape, np.dtype(dtype), owner=False)
+
+    def get_descriptor(self):
+        """Returns the (name, shape, dtype) descriptor other processes attach to the array with."""
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def release(self):
+        """Closes the shared memory block, and unlinks it if this process owns it."""
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedWords:
+    """
+    The word data of a game in shared memory: the letters of the legal words (encoded with encode_words), the ids
+    of the secret words among them, and the codes of the legal words pattern matrix of a pattern rule.
+    """
+    def __init__(self, letters: SharedArray, secret_ids: SharedArray, codes: SharedArray, rule):
+        """Initializes the shared word data with its shared arrays and the pattern rule of its codes."""
+        self.letters = letters
+        self.secret_ids = secret_ids
+        self.codes = codes
+        self.rule = rule
+
+    def get_descriptor(self):
+        """Returns the descriptor other processes attach to the word data with."""
+        return (self.letters.get_descriptor(), self.secret_ids.get_descriptor(), self.codes.get_descriptor(),
+                self.rule)
+
+    def release(self):
+        """Releases the shared arrays."""
+        for shared_array in (self.letters, self.secret_ids, self.codes):
+            shared_array.release()
+
+
+def share_words(legal_words, secret_words, rule):
+    """Publishes the word data of the given word lists and pattern rule to shared memory (once per process), and
+    returns its descriptor."""
+    key = (id(legal_words), id(secret_words), rule)
+    if key in _published_words:
+        published_legal_words, published_secret_words, shared_words = _published_words[key]
+        if published_legal_words is legal_words and published_secret_words is secret_words:
+            return shared_words.get_descriptor()
+        shared_words.release()
+
+    vocabulary = get_vocabulary(legal_words)
+    shared_words = SharedWords(SharedArray.create(vocabulary.letters),
+                               SharedArray.create(vocabulary.get_ids(secret_words)),
+                               SharedArray.create(get_pattern_matrix(legal_words, legal_words, rule).codes), rule)
+    _published_words[key] = (legal_words, secret_words, shared_words)
+    return shared_words.get_descriptor()
+
+
+def get_shared_words_descriptor(legal_words, secret_words, rule):
+    """Returns the descriptor of the word data of the given word lists and pattern rule if it was published by this
+    process, and None otherwise."""
+    published = _published_words.get((id(legal_words), id(secret_words), rule))
+    if published is None or published[0] is not legal_words or published[1] is not secret_words:
+        return None
+    return published[2].get_descriptor()
+
+
+def attach_shared_words(descriptor):
+    """
+    Attaches to the published word data with the given descriptor (once per process), and returns the legal and
+    secret word lists decoded from it. The attached pattern codes are registered as the pattern matrix of the word
+    lists, so they are never loaded or computed again by this process.
+    """
+    letters_descriptor, secret_ids_descriptor, codes_descriptor, rule = descriptor
+    name = letters_descriptor[0]
+    if name not in _attached_words:
+        letters = SharedArray.attach(letters_descriptor)
+        secret_ids = SharedArray.attach(secret_ids_descriptor)
+        words_bytes = (letters.array + ord('a')).astype(np.uint8).tobytes().decode('ascii')
+        legal_words = [words_bytes[i:i + LETTERS_NUM] for i in range(0, len(words_bytes), LETTERS_NUM)]
+        secret_words = [legal_words[i] for i in secret_ids.array.tolist()]
+        _attached_words[name] = (legal_words, secret_words, SharedWords(letters, secret_ids, None, rule), {})
+    legal_words, secret_words, shared_words, attached_codes = _attached_words[name]
+    if rule not in attached_codes:
+        attached_codes[rule] = SharedArray.attach(codes_descriptor)
+        add_pattern_matrix(legal_words, legal_words, rule, attached_codes[rule].array)
+    return legal_words, secret_words
+
+
+class ScoringPool:
+    """
+    A process pool scoring candidate words in parallel. The candidates are split into contiguous chunks, one per
+    process, and the scores are concatenated in the order of the candidates, so the result is exactly the result of
+    scoring all of them in this process. The games sent to the workers carry a descriptor of their word data in shared
+    memory instead of their word lists.
+    """
+    def __init__(self, processes: int):
+        """Initializes a pool with the given number of processes."""
+        self.processes = processes
+        # the workers must share the resource tracker of this process, or each of them would unlink the shared
+        # memory blocks it attached to when it stops
+        resource_tracker.ensure_running()
+        self.pool = Pool(processes)
+
+    def score(self, score_function, candidate_ids: np.ndarray, game, *args) -> np.ndarray:
+        """Returns score_function(candidate_ids, game, *args) computed over chunks of the candidates in parallel."""
+        share_words(game.get_legal_words(), game.get_secret_words(), game.pattern_rule)
+        chunks = [chunk for chunk in np.array_split(candidate_ids, self.processes) if len(chunk)]
+        scores = self.pool.starmap(score_function, [(chunk, game) + args for chunk in chunks])
+        return np.concatenate(scores)
+
+    def starmap(self, function, game, args_list):
+        """Returns [function(*args) for args in args_list] computed in parallel. The games in the arguments carry a
+        descriptor of the word data of the given game in shared memory instead of their word lists."""
+        share_words(game.get_legal_words(), game.get_secret_words(), game.pattern_rule)
+        return self.pool.starmap(function, args_list)
+
+    def close(self):
+        """Stops the processes of the pool."""
+        self.pool.terminate()
+        self.pool.join()
+
+
+def get_scoring_pool(processes: int) -> ScoringPool:
+    """Returns the scoring pool with the given number of processes, creating it on the first call."""
+    if processes not in _scoring_pools:
+        _scoring_pools[processes] = ScoringPool(processes)
+    return _scoring_pools[processes]
+
+
+def score_candidates(score_function, candidate_ids: np.ndarray, game, processes: int, *args) -> np.ndarray:
+    """Returns score_function(candidate_ids, game, *args), computed by a scoring pool with the given number of
+    processes if there is more than one process and enough candidates."""
+    if processes > 1 and len(candidate_ids) >= MIN_PARALLEL_CANDIDATES:
+        return get_scoring_pool(processes).score(score_function, candidate_ids, game, *args)
+    return score_function(candidate_ids, game, *args)
+
+
+def starmap_games(function, game, processes: int, args_list):
+    """Returns [function(*args) for args in args_list], computed by a scoring pool with the given number of processes
+    if there is more than one process and more than one call."""
+    if processes > 1 and len(args_list) > 1:
+        return get_scoring_pool(processes).starmap(function, game, args_list)
+    return [function(*args) for args in args_list]
+
+
+@atexit.register
+def _release_all():
+    """Stops the scoring pools and releases the shared memory published by this process."""
+    for scoring_pool in _scoring_pools.values():
+        scoring_pool.close()
+    _scoring_pools.clear()
+    for _, _, shared_words in _published_words.values():
+        shared_words.release()
+    _published_words.clear()
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+
+from utils.common import DATA_DIR, PatternRule, Word
+from utils.patterns import get_patterns
+from utils.vocabulary import Vocabulary, get_vocabulary, word_list_hash
+
+PATTERN_MATRIX_DIR = os.path.join(DATA_DIR, "pattern_matrices")
+PATTERN_MATRIX_VERSION = 1
+
+# matrices already loaded by this process, keyed by (rule, id(guess_words), id(secret_words))
+_loaded_matrices = {}
+
+
+class PatternMatrix:
+    """
+    A matrix holding the pattern code of every guess word against every secret word, so patterns are looked up
+    by word id instead of being computed with get_pattern. codes[i, j] is the code of the pattern of the guess with
+    id i in the guess vocabulary according to the secret word with id j in the secret vocabulary.
+    """
+    def __init__(self, guess_vocabulary: Vocabulary, secret_vocabulary: Vocabulary, codes):
+        """Initializes the matrix with the vocabularies of its rows and columns and the (memory mapped) codes."""
+        self.guess_vocabulary = guess_vocabulary
+        self.secret_vocabulary = secret_vocabulary
+        self.codes = codes
+
+    def get_code(self, guess: Word, secret_word: Word) -> int:
+        """Returns the pattern code of the guess according to the secret word."""
+        return int(self.codes[self.guess_vocabulary.get_id(guess), self.secret_vocabulary.get_id(secret_word)])
+
+    def get_codes(self, guess: Word, secret_ids) -> np.ndarray:
+        """Returns an array of the pattern codes of the guess according to each of the secret words with the
+        given ids."""
+        return self.codes[self.guess_vocabulary.get_id(guess)][secret_ids]
+
+    def get_codes_block(self, guess_ids, secret_ids) -> np.ndarray:
+        """Returns the len(guess_ids) x len(secret_ids) block of the pattern codes of the guesses with the given ids
+        according to each of the secret words with the given ids."""
+        if secret_ids is self.secret_vocabulary.all_ids:
+            return self.codes[guess_ids]  # whole rows, copied without indexing every column
+        return self.codes[np.ix_(guess_ids, secret_ids)]
+
+    def get_pair_codes(self, guess_ids, secret_ids) -> np.ndarray:
+        """Returns the pattern codes of every guess with the given ids according to the secret word with the id at the
+        same index."""
+        return self.codes[guess_ids, secret_ids]
+
+    def get_buckets(self, guess: Word, secret_ids: np.ndarray):
+        """Returns the pattern codes of the guess according to the secret words with the given ids (each code once,
+        in increasing order), and the ids split into buckets by their codes, in one pass over the codes."""
+        if not len(secret_ids):
+            return [], []
+        codes = self.get_codes(guess, secret_ids)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1
+        return sorted_codes[np.concatenate(([0], starts))].tolist(), np.split(secret_ids[order], starts)
+
+
+def compute_pattern_codes(guess_words, secret_words, rule=PatternRule.Basic):
+    """Computes the pattern codes of every guess word against every secret word with the batch pattern kernel."""
+    return get_patterns(get_vocabulary(guess_words).letters, get_vocabulary(secret_words).letters, rule)
+
+
+def get_matrix_path(guess_words, secret_words, rule=PatternRule.Basic):
+    """Returns the cache file path of the pattern matrix of the given word lists and rule."""
+    words_hash = word_list_hash(guess_words, secret_words)
+    return os.path.join(PATTERN_MATRIX_DIR, f"{rule.value}_v{PATTERN_MATRIX_VERSION}_{words_hash}.npy")
+
+
+def add_pattern_matrix(guess_words, secret_words, rule, codes):
+    """Registers precomputed codes (such as codes attached from shared memory) as the pattern matrix of the given word
+    lists and rule in this process."""
+    matrix = PatternMatrix(get_vocabulary(guess_words), get_vocabulary(secret_words), codes)
+    _loaded_matrices[(rule, id(guess_words), id(secret_words))] = matrix
+
+
+def get_pattern_matrix(guess_words, secret_words, rule=PatternRule.Basic) -> PatternMatrix:
+    """
+    Returns the pattern matrix of the given word lists and pattern rule.
+    The matrix is computed once per word lists and rule and stored as a uint8 .npy file keyed by a hash of the word
+    lists. Later calls (and later processes) memory map the stored file, so they start instantly.
+    """
+    key = (rule, id(guess_words), id(secret_words))
+    if key in _loaded_matrices:
+        matrix = _loaded_matrices[key]
+        if matrix.guess_vocabulary.words is guess_words and matrix.secret_vocabulary.words is secret_words:
+            return matrix
+
+    path = get_matrix_path(guess_words, secret_words, rule)
+    if not os.path.isfile(path):
+        codes = compute_pattern_codes(guess_words, secret_words, rule)
+        os.makedirs(PATTERN_MATRIX_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, codes)
+        os.replace(tmp_path, path)  # atomic, so other processes never see a partially written matrix
+
+    matrix = PatternMatrix(get_vocabulary(guess_words), get_vocabulary(secret_words), np.load(path, mmap_mode='r'))
+    _loaded_matrices[key] = matrix
+    return matrix
@@ -0,0 +1,70 @@
+import numpy as np
+
+from utils.common import Placing, PatternRule, LETTERS_NUM
+
+# the number of (guess, secret word) pairs processed at once, small enough for the batch arrays to stay in cache
+MAX_BATCH_PAIRS = 2 ** 18
+
+
+def encode_words(words) -> np.ndarray:
+    """Encodes a list of words as an N x LETTERS_NUM uint8 array of letter indices ('a' is 0)."""
+    if not len(words):
+        return np.empty((0, LETTERS_NUM), dtype=np.uint8)
+    letters = np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(-1, LETTERS_NUM)
+    return letters - ord("a")
+
+
+def get_basic_codes(guesses: np.ndarray, secrets: np.ndarray) -> np.ndarray:
+    """
+    Returns the M x N pattern codes of every encoded guess according to every encoded secret word, following the basic
+    Wordle rules of BasicWordle.get_pattern: a letter that is not green is yellow only while the secret word still has
+    unmatched (non green) copies of it, which are used by the guess letters from left to right.
+    """
+    not_green = [guesses[:, i, None] != secrets[None, :, i] for i in range(LETTERS_NUM)]
+    codes = np.zeros((len(guesses), len(secrets)), dtype=np.uint8)
+    for i in range(LETTERS_NUM):
+        guess_letter = guesses[:, i, None]
+        pool = np.zeros(codes.shape, dtype=np.uint8)  # non green copies of the letter in the secret word
+        for k in range(LETTERS_NUM):
+            pool += (guess_letter == secrets[None, :, k]) & not_green[k]
+        for j in range(i):  # copies already used by non green copies of the letter earlier in the guess
+            pool -= (guesses[:, j, None] == guess_letter) & not_green[j] & (pool > 0)
+        placing = (np.uint8(Placing.incorrect) - (pool > 0)) * not_green[i]  # incorrect, misplaced or correct (0)
+        codes += placing * np.uint8(3 ** (LETTERS_NUM - 1 - i))
+    return codes
+
+
+def get_yellow_codes(guesses: np.ndarray, secrets: np.ndarray) -> np.ndarray:
+    """
+    Returns the M x N pattern codes of every encoded guess according to every encoded secret word, following the
+    Yellow Wordle rules of YellowWordle.get_pattern: a letter is yellow only while the secret word still has copies
+    of it, which are used by the guess letters from left to right.
+    """
+    codes = np.zeros((len(guesses), len(secrets)), dtype=np.uint8)
+    for i in range(LETTERS_NUM):
+        guess_letter = guesses[:, i, None]
+        pool = np.zeros(codes.shape, dtype=np.uint8)  # copies of the letter in the secret word
+        for k in range(LETTERS_NUM):
+            pool += guess_letter == secrets[None, :, k]
+        for j in range(i):  # copies already used by copies of the letter earlier in the guess
+            pool -= (guesses[:, j, None] == guess_letter) & (pool > 0)
+        placing = np.uint8(Placing.incorrect) - (pool > 0)  # incorrect or misplaced
+        codes += placing * np.uint8(3 ** (LETTERS_NUM - 1 - i))
+    return codes
+
+
+CODES_FUNCTIONS = {PatternRule.Basic: get_basic_codes, PatternRule.Yellow: get_yellow_codes}
+
+
+def get_patterns(guesses: np.ndarray, secrets: np.ndarray, rule=PatternRule.Basic) -> np.ndarray:
+    """
+    Returns an M x N uint8 array of the pattern codes of every guess according to every secret word, given the
+    guesses and secret words encoded with encode_words. The patterns are computed with NumPy over batches of guesses,
+    looping only over the letter positions and never over word pairs.
+    """
+    get_codes = CODES_FUNCTIONS[rule]
+    codes = np.empty((len(guesses), len(secrets)), dtype=np.uint8)
+    batch_size = max(1, MAX_BATCH_PAIRS // max(1, len(secrets)))
+    for start in range(0, len(guesses), batch_size):
+        codes[start:start + batch_size] = get_codes(guesses[start:start + batch_size], secrets)
+    return codes
@@ -0,0 +1,58 @@
+import numpy as np
+
+from utils.vocabulary import Vocabulary
+
+TABULAR_STATES_NUM = 1  # the tabular Q-learning agent plays every turn from the single state 0
+
+
+class ActionRanking:
+    """
+    The words of a vocabulary ranked by their Q-values in a state, so the best legal actions are found by their ranks
+    instead of their Q-values. The words with equal Q-values share a tie group, and groups[word id] is the rank of the
+    group of the word (0 for the words with the highest Q-value).
+    """
+    def __init__(self, q_values: np.ndarray, all_ids: np.ndarray):
+        """Ranks the words with the given Q-values (aligned to the word ids), where all_ids are the ids of all of
+        them."""
+        order = np.argsort(-q_values, kind='stable')  # equal Q-values are kept in the order of the word ids
+        sorted_q_values = q_values[order]
+        new_groups = np.concatenate(([True], sorted_q_values[1:] != sorted_q_values[:-1]))
+        self.groups = np.empty(len(order), dtype=np.int32)
+        self.groups[order] = np.cumsum(new_groups) - 1
+        self.all_ids = all_ids
+        self.top_ids = np.sort(order[self.groups[order] == 0])
+
+    def get_best_ids(self, action_ids) -> np.ndarray:
+        """Returns the ids of the legal actions with the given ids in the best tie group among them, in the order of
+        the given ids. All the words of the vocabulary (the legal actions of a reset game) are answered without
+        looking at them."""
+        if action_ids is self.all_ids:
+            return self.top_ids
+        groups = self.groups[action_ids]
+        return action_ids[groups == groups.min()]
+
+
+def create_q_table(vocabulary: Vocabulary, states_num=TABULAR_STATES_NUM) -> np.ndarray:
+    """Returns a zero Q-table of the words of the vocabulary - a states_num x len(vocabulary) float64 array, holding
+    the Q-value of (state id, word id) at [state id, word id]."""
+    return np.zeros((states_num, len(vocabulary)))
+
+
+def convert_q_values(q_values, vocabulary: Vocabulary) -> np.ndarray:
+    """Returns the Q-table of a util.Counter of Q-values keyed by (state id, word) tuples, with the word ids of the
+    vocabulary. The Q-values of words outside the vocabulary are dropped."""
+    items = [(state, word, q_value) for (state, word), q_value in q_values.items() if word in vocabulary]
+    states = np.fromiter((state for state, _, _ in items), dtype=np.intp, count=len(items))
+    q_table = create_q_table(vocabulary, max(TABULAR_STATES_NUM, int(states.max(initial=-1)) + 1))
+    q_table[states, vocabulary.get_ids([word for _, word, _ in items])] = [q_value for _, _, q_value in items]
+    return q_table
+
+
+def remap_q_table(q_table: np.ndarray, vocabulary: Vocabulary, new_vocabulary: Vocabulary) -> np.ndarray:
+    """Returns the Q-table of the words of new_vocabulary holding the Q-values of the same words in the given Q-table of
+    the words of vocabulary, and 0 (the Q-value of an action never updated) for the words not in it."""
+    ids = np.array([vocabulary.word_ids.get(word, -1) for word in new_vocabulary.words], dtype=np.intp)
+    known = ids >= 0
+    new_q_table = create_q_table(new_vocabulary, len(q_table))
+    new_q_table[:, known] = q_table[:, ids[known]]
+    return new_q_table
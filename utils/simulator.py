@@ -2,7 +2,7 @@ import time
 import numpy as np
 from tqdm import tqdm
 
-from utils.common import Placing
+from utils.common import Placing, code_to_pattern
 from utils.first_gui import GraphicalInterface
 
 
@@ -49,7 +49,8 @@ class Simulator:
 
         while not done:
             guess = self.algo.get_action(self.game)
-            pattern, done, is_win = self.game.step(guess, secret_word)
+            pattern_code, done, is_win = self.game.step(guess, secret_word)
+            pattern = code_to_pattern(pattern_code)
             num_guesses += 1
             num_letters_guessed += len(guess)
             num_correct_letters_guessed += pattern.count(int(Placing.correct))
@@ -91,3 +92,5 @@ class Simulator:
         print('% Correct Letters:   {:.3f}'.format(float(cum_stats[3]) / cum_stats[2] * 100))
         print('% Misplaced Letters: {:.3f}'.format(float(cum_stats[4]) / cum_stats[2] * 100))
         print('% Incorrect Letters: {:.3f}'.format(float(cum_stats[5]) / cum_stats[2] * 100))
+        for name, value in self.algo.get_search_stats().items():
+            print('{}: {}'.format(name, value))
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_TABLE_SIZE = 2 ** 18  # the number of searched states kept by a transposition table
+
+# the kinds of values stored in a transposition table
+EXACT = 0  # the value of the state
+LOWER_BOUND = 1  # the value of the state is at least the stored value (the search failed high)
+UPPER_BOUND = 2  # the value of the state is at most the stored value (the search failed low)
+
+
+class TranspositionTable:
+    """
+    A bounded table of the values of the states searched by the adversarial agents, so states reached again (by
+    other guesses splitting the possible words into the same sets, or in later turns) are not searched again.
+    The least recently used states are dropped when the table is full. Values searched with an alpha-beta window are
+    stored as bounds when they fall outside of it, and are used only by searches they decide.
+    The table is not sent to other processes, which start with an empty table of the same size.
+    """
+    def __init__(self, max_size=DEFAULT_TABLE_SIZE):
+        """Initializes an empty table keeping at most max_size states."""
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        """Returns the state of the table to pickle - only its size."""
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        """Restores an empty table of the pickled size."""
+        self.__init__(state["max_size"])
+
+    def __len__(self):
+        """Returns the number of states in the table."""
+        return len(self.entries)
+
+    def lookup(self, key, alpha=-np.inf, beta=np.inf) -> Optional[float]:
+        """Returns the stored value of the state with the given key if it decides a search with the given window
+        (it is exact, or a bound outside of the window), and None otherwise."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            value, kind = entry
+            if kind == EXACT or (kind == LOWER_BOUND and value >= beta) or (kind == UPPER_BOUND and value <= alpha):
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def store(self, key, value, alpha=-np.inf, beta=np.inf):
+        """Stores the value of the state with the given key, as searched with the given window."""
+        if value <= alpha:
+            kind = UPPER_BOUND
+        elif value >= beta:
+            kind = LOWER_BOUND
+        else:
+            kind = EXACT
+        self.entries[key] = (value, kind)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all the states from the table."""
+        self.entries.clear()
+
+    def get_stats(self):
+        """Returns the number of lookups which found a value, the number of those which did not, and the number of
+        states in the table."""
+        lookups = self.hits + self.misses
+        hit_percentage = self.hits / lookups * 100.0 if lookups else 0.0
+        return {"# Table hits": self.hits, "# Table misses": self.misses,
+                "% Table hits": f"{hit_percentage:.3f}", "# Table states": len(self.entries)}
@@ -0,0 +1,83 @@
+import hashlib
+from typing import List
+
+import numpy as np
+
+from utils.common import Word
+from utils.letter_index import LetterIndex
+from utils.patterns import encode_words
+
+# vocabularies already built by this process, keyed by id(words)
+_loaded_vocabularies = {}
+
+
+def word_list_hash(*word_lists):
+    """Returns a short hash identifying the given word lists (and their order)."""
+    sha = hashlib.sha1()
+    for words in word_lists:
+        sha.update("\n".join(words).encode())
+        sha.update(b"\0")
+    return sha.hexdigest()[:16]
+
+
+class Vocabulary:
+    """
+    A word list where every word has an id - its index in the list. It holds a word to id dictionary and the words
+    encoded as an N x LETTERS_NUM letter array, so games can hold sets of words as NumPy arrays of ids and build
+    the words themselves only when asked to.
+    """
+    def __init__(self, words):
+        """Initializes the vocabulary of the given word list."""
+        self.words = words
+        self.word_ids = {word: i for i, word in enumerate(words)}
+        self.letters = encode_words(words)
+        self.all_ids = np.arange(len(words))
+        self.all_ids.flags.writeable = False  # shared by every game holding all the words
+        self._letter_index = None
+        self._hash = None
+
+    def __len__(self):
+        """Returns the number of words in the vocabulary."""
+        return len(self.words)
+
+    def __contains__(self, word):
+        """Returns whether the word is in the vocabulary, in O(1)."""
+        return word in self.word_ids
+
+    def get_hash(self):
+        """Returns a short hash identifying the word list of the vocabulary."""
+        if self._hash is None:
+            self._hash = word_list_hash(self.words)
+        return self._hash
+
+    def get_id(self, word: Word) -> int:
+        """Returns the id of the word."""
+        return self.word_ids[word]
+
+    def get_ids(self, words) -> np.ndarray:
+        """Returns an array of the ids of the given words."""
+        if words is self.words:
+            return self.all_ids
+        return np.array([self.word_ids[word] for word in words], dtype=self.all_ids.dtype)
+
+    def get_words(self, ids) -> List[Word]:
+        """Returns the list of the words with the given ids."""
+        if ids is self.all_ids:
+            return self.words
+        words = self.words
+        return [words[i] for i in ids.tolist()]
+
+    def get_letter_index(self) -> LetterIndex:
+        """Returns the index of the letter constraint bitmasks of the vocabulary, building it on the first call."""
+        if self._letter_index is None:
+            self._letter_index = LetterIndex(self.letters)
+        return self._letter_index
+
+
+def get_vocabulary(words) -> Vocabulary:
+    """Returns the vocabulary of the given word list, building it only once per list in every process."""
+    vocabulary = _loaded_vocabularies.get(id(words))
+    if vocabulary is None or vocabulary.words is not words:
+        vocabulary = Vocabulary(words)
+        _loaded_vocabularies[id(words)] = vocabulary
+    return vocabulary